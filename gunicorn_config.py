@@ -2,5 +2,19 @@ import os
 
 port = int(os.getenv("PORT", 10000))
 bind = f"0.0.0.0:{port}"
-workers = 4
-timeout = 120 
\ No newline at end of file
+
+# Live mode keeps its rolling aggregates in process memory: with several workers
+# each one would tail LIVE_SOURCE on its own and POSTs and polls would land on
+# different aggregators, so it always runs a single worker
+LIVE_MODE = bool(os.getenv("LIVE_SOURCE")) or os.getenv("LIVE_INGEST", "").lower() in ("1", "true", "yes")
+workers = 1 if LIVE_MODE else 4
+timeout = 120
+
+def on_starting(server):
+    # Workers can still be overridden on the command line (-w / --workers)
+    if LIVE_MODE and server.cfg.workers > 1:
+        server.log.warning(
+            f"Live mode (LIVE_SOURCE/LIVE_INGEST) is running with {server.cfg.workers} workers; "
+            "each worker keeps its own live aggregates, so the live view will be inconsistent. "
+            "Run with a single worker."
+        )
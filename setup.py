@@ -9,16 +9,22 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pandas>=2.2.3",
+        "pyarrow>=16.0.0",
         "nltk>=3.8.1",
         "spacy>=3.7.2",
         "plotly>=5.18.0",
         "dash>=2.14.0",
         "scikit-learn>=1.3.0",
+        "scipy>=1.13.0",
         "python-dotenv>=1.0.0",
         "numpy>=2.0.0,<2.1.0",
         "matplotlib>=3.7.2",
         "seaborn>=0.12.2"
     ],
+    extras_require={
+        # Static PNG/PDF report export
+        "report": ["kaleido>=0.2.1"],
+    },
     python_requires=">=3.8",
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from data_processing.dtypes import DAYS_OF_WEEK
+
+# Time windows the summaries are precomputed for (pandas period aliases)
+WINDOWS = ['1h', '1D', '1W']
+
+# Per-comment feature counts averaged per window as engagement signals
+SIGNAL_COLUMNS = ['mention_count', 'emoji_count', 'hashtag_count', 'url_count']
+
+class AggregateAnalyzer:
+    """Precompute the time-series summaries served by the dashboard API.
+
+    Volume and engagement signals per window, the most frequent analyzed
+    keywords per window, topic sizes, top hashtags, the comment length
+    histogram and activity by day and hour are computed once per pipeline
+    run, so readers only load a small JSON file instead of scanning the comments.
+    """
+
+    def __init__(self, windows=None, top_n=10, length_bins=50):
+        self.windows = windows or WINDOWS
+        self.top_n = top_n
+        self.length_bins = length_bins
+
+    def _window_starts(self, timestamps, window):
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert(None)
+        return timestamps.dt.to_period(window).dt.start_time
+
+    def volume(self, df, window):
+        counts = df.groupby(self._window_starts(df['timestamp'], window)).size()
+        return [{'time': time.isoformat(), 'count': int(count)} for time, count in counts.items()]
+
+    def signals(self, df, window):
+        """Mean mentions, emoji, hashtags and links per comment in each window."""
+        columns = [column for column in SIGNAL_COLUMNS if column in df.columns]
+        if not columns:
+            return []
+        means = df.groupby(self._window_starts(df['timestamp'], window))[columns].mean()
+        return [
+            {'time': time.isoformat(), **{column.replace('_count', ''): float(row[column]) for column in columns}}
+            for time, row in means.iterrows()
+        ]
+
+    def comment_lengths(self, df):
+        """Histogram of comment lengths as bin edges and counts."""
+        lengths = pd.to_numeric(df['comment_length'], errors='coerce').dropna().to_numpy()
+        if len(lengths) == 0:
+            return []
+        counts, edges = np.histogram(lengths, bins=self.length_bins)
+        return [{'bin_start': float(start), 'bin_end': float(end), 'count': int(count)}
+                for start, end, count in zip(edges[:-1], edges[1:], counts)]
+
+    def activity(self, df):
+        """Comment counts by day of week (Monday first) and by hour of day."""
+        days = df['day_of_week'].astype(str).value_counts()
+        hours = df['hour'].value_counts().sort_index()
+        return {
+            'day_of_week': [{'day': day, 'count': int(days[day])} for day in DAYS_OF_WEEK if day in days],
+            'hour': [{'hour': int(hour), 'count': int(count)} for hour, count in hours.items()]
+        }
+
+    def keywords(self, df, keywords, window):
+        """Top keywords (restricted to the analyzed ones) per window, counting every comment."""
+        tokens = df['processed_comment'].fillna('').astype(str).str.split().explode()
+        tokens = tokens[tokens.isin(set(keywords))]
+        if tokens.empty:
+            return []
+        starts = self._window_starts(df['timestamp'], window).loc[tokens.index]
+        counts = (pd.DataFrame({'time': starts.to_numpy(), 'keyword': tokens.to_numpy()})
+                  .groupby(['time', 'keyword']).size()
+                  .sort_values(ascending=False))
+        top = counts.groupby(level='time', sort=True).head(self.top_n)
+        result = []
+        for time, group in top.groupby(level='time', sort=True):
+            result.append({
+                'time': time.isoformat(),
+                'keywords': [{'keyword': keyword, 'count': int(count)}
+                             for (_, keyword), count in group.sort_values(ascending=False).items()]
+            })
+        return result
+
+    def topics(self, df):
+        if 'topic_id' not in df.columns:
+            return []
+        counts = df.groupby('topic_id').size()
+        return [{'topic_id': int(topic_id), 'count': int(count)} for topic_id, count in counts.items()]
+
+    def hashtags(self, df, top_n=50):
+        counts = df['hashtags'].explode().dropna().value_counts().head(top_n)
+        return [{'hashtag': tag, 'count': int(count)} for tag, count in counts.items()]
+
+    def analyze(self, df, keywords=()):
+        """All summaries for df, keyed by window where they vary over time."""
+        return {
+            'total_comments': int(len(df)),
+            'volume': {window: self.volume(df, window) for window in self.windows},
+            'signals': {window: self.signals(df, window) for window in self.windows},
+            'keywords': {window: self.keywords(df, keywords, window) for window in self.windows},
+            'topics': self.topics(df),
+            'hashtags': self.hashtags(df),
+            'comment_lengths': self.comment_lengths(df),
+            'activity': self.activity(df)
+        }
@@ -3,16 +3,14 @@ from typing import List, Dict
 import time
 import re
 from collections import Counter
-import spacy
 import nltk
 from nltk.corpus import wordnet
 from nltk.tokenize import word_tokenize
-from nltk.collocations import BigramCollocationFinder
-from nltk.metrics import BigramAssocMeasures
+from analysis.phrase_miner import PhraseMiner
+from data_processing.nlp import load_spacy_model
 
 class KeywordAnalyzer:
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, brand_stop_words=None):
         # Common words to exclude
         self.stop_words = set([
             'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
@@ -25,16 +23,16 @@ class KeywordAnalyzer:
             'than', 'then', 'now', 'look', 'only', 'come', 'its', 'over', 'think', 'also',
             'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first', 'well', 'way',
             'even', 'new', 'want', 'because', 'any', 'these', 'give', 'day', 'most', 'us',
-            # Custom stop words for this project
-            'treehut', 'tree', 'love', 'need', 'zulu',
             # Additional stop words
             'real', 'really', 'send', 'thank', 'wait', 'where', 'wish',
-            'body', 'friend', 'great', 'hello', 'question', 'skin', 'stuff',
-            'april', 'best', 'bought', 'fools', 'found', 'looks',
-            'smell', 'smells', 'amazing', 'bring'
+            'friend', 'great', 'hello', 'question', 'stuff',
+            'best', 'bought', 'found', 'looks', 'amazing', 'bring'
         ])
+        # Brand-specific stop words come from the brand configuration
+        self.stop_words.update(brand_stop_words or [])
         self.max_keywords = 50  # Increased since we're not limited by API calls
-        
+        self.phrase_miner = PhraseMiner()
+
     def is_valid_keyword(self, word: str) -> bool:
         """Check if a word is valid for keyword analysis."""
         # Must be at least 4 characters
@@ -64,64 +62,81 @@ class KeywordAnalyzer:
                     synonyms.add(lemma.name())
         return list(synonyms)
     
-    def get_related_terms(self, word: str, df: pd.DataFrame, text_column: str = 'comment_text') -> List[Dict]:
+    def _weights(self, df: pd.DataFrame, weight_column: str = None) -> pd.Series:
+        """Per-row weights: the weight column (e.g. cluster size) or 1 for every row."""
+        if weight_column is None:
+            return pd.Series(1, index=df.index)
+        return df[weight_column]
+    
+    def get_related_terms(self, word: str, df: pd.DataFrame, text_column: str = 'comment_text',
+                          weight_column: str = None) -> List[Dict]:
         """Get terms that frequently co-occur with the given word."""
         # Find sentences containing the word
         sentences = []
-        for text in df[text_column]:
+        for text, weight in zip(df[text_column], self._weights(df, weight_column).tolist()):
             # Convert to string and handle NaN values
             if pd.isna(text):
                 continue
             text_str = str(text).lower()
             if word.lower() in text_str:
-                sentences.append(text_str)
+                sentences.append((text_str, weight))
         
         # Extract words that co-occur
         co_occurring = Counter()
-        for sentence in sentences:
+        for sentence, weight in sentences:
             words = word_tokenize(sentence)
             for w in words:
                 if self.is_valid_keyword(w) and w != word.lower():
-                    co_occurring[w] += 1
+                    co_occurring[w] += weight
         
         # Get top co-occurring terms
         return [{'term': term, 'count': count} for term, count in co_occurring.most_common(10)]
     
-    def get_key_phrases(self, word: str, df: pd.DataFrame, text_column: str = 'comment_text') -> List[Dict]:
+    def get_key_phrases(self, word: str, df: pd.DataFrame, text_column: str = 'comment_text',
+                        weight_column: str = None) -> List[Dict]:
         """Get key phrases containing the given word."""
         # Find sentences containing the word
         sentences = []
-        for text in df[text_column]:
+        for text, weight in zip(df[text_column], self._weights(df, weight_column).tolist()):
             # Convert to string and handle NaN values
             if pd.isna(text):
                 continue
             text_str = str(text).lower()
             if word.lower() in text_str:
-                sentences.append(text_str)
+                sentences.append((text_str, weight))
         
         # Extract noun phrases using spaCy
         phrases = Counter()
-        for sentence in sentences:
-            doc = self.nlp(sentence)
+        nlp = load_spacy_model()
+        for sentence, weight in sentences:
+            doc = nlp(sentence)
             for chunk in doc.noun_chunks:
                 if word.lower() in chunk.text.lower():
-                    phrases[chunk.text] += 1
+                    phrases[chunk.text] += weight
         
         return [{'phrase': phrase, 'count': count} for phrase, count in phrases.most_common(10)]
     
-    def analyze_keywords_in_corpus(self, df: pd.DataFrame, text_column: str = 'processed_comment') -> pd.DataFrame:
-        """Analyze keywords in the corpus and find related terms."""
+    def analyze_keywords_in_corpus(self, df: pd.DataFrame, text_column: str = 'processed_comment',
+                                   weight_column: str = None, phrases: pd.DataFrame = None) -> pd.DataFrame:
+        """Analyze keywords in the corpus and find related terms.
+
+        With weight_column (e.g. 'cluster_size' from CommentDeduplicator) only
+        cluster representatives are scanned and each counts as its whole cluster.
+        With phrases from PhraseMiner.mine(), key phrases are looked up in the
+        mined collocations instead of parsing every matching comment with spaCy.
+        """
+        if weight_column is not None:
+            df = df[df['is_representative']]
+        
         # Extract unique words from the corpus
-        all_words = []
-        for text in df[text_column]:
-            if pd.isna(text):
-                continue
-            all_words.extend(str(text).lower().split())
+        words = df[text_column].dropna().astype(str).str.lower().str.split()
+        weights = self._weights(df, weight_column).loc[words.index]
+        all_words = words.explode().dropna()
         
         unique_words = set(all_words)
         
         # Filter and sort words by frequency
-        word_freq = pd.Series(all_words).value_counts()
+        word_freq = weights.loc[all_words.index].groupby(all_words.to_numpy()).sum()
         valid_words = [word for word in unique_words if self.is_valid_keyword(word)]
         
         # Sort words by frequency and take top N
@@ -134,8 +149,11 @@ class KeywordAnalyzer:
                 print(f"Analyzing keyword: {word} (frequency: {word_freq[word]})")
                 
                 synonyms = self.get_synonyms(word)
-                related_terms = self.get_related_terms(word, df, text_column)
-                key_phrases = self.get_key_phrases(word, df, text_column)
+                related_terms = self.get_related_terms(word, df, text_column, weight_column)
+                if phrases is not None:
+                    key_phrases = self.phrase_miner.phrases_for_keyword(phrases, word)
+                else:
+                    key_phrases = self.get_key_phrases(word, df, text_column, weight_column)
                 
                 keyword_analysis.append({
                     'keyword': word,
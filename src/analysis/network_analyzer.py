@@ -0,0 +1,118 @@
+import pandas as pd
+import numpy as np
+import json
+import ast
+
+class HashtagNetworkAnalyzer:
+    def __init__(self, layout_iterations=50, random_state=42):
+        self.layout_iterations = layout_iterations
+        self.random_state = random_state
+        # Rows per block when computing pairwise repulsion, keeps memory bounded
+        # for graphs with thousands of nodes
+        self.layout_block_size = 512
+
+    def _as_tag_lists(self, series):
+        """Normalize a hashtag column (lists, parquet arrays or their string repr from CSV) to lists."""
+        return series.apply(
+            lambda tags: ast.literal_eval(tags) if isinstance(tags, str) else (list(tags) if isinstance(tags, (list, np.ndarray)) else [])
+        )
+
+    def build_graph(self, df, column='hashtags', min_count=1):
+        """Build an integer-indexed hashtag co-occurrence graph.
+
+        Returns a dict of parallel arrays: node labels and counts, and edges
+        as (source, target, value) index arrays sorted by descending weight.
+        """
+        # Comments on the same post repeat its caption hashtags, so count each distinct
+        # tag list once and weight it by how many rows carry it
+        keys = self._as_tag_lists(df[column]).map(tuple).to_numpy()
+        list_codes, tag_lists = pd.factorize(keys)
+        weights = np.bincount(list_codes, minlength=len(tag_lists))
+
+        tags = pd.Series(tag_lists, dtype=object).explode().dropna()
+        tags = tags[tags != '']
+        if tags.empty:
+            return {'labels': [], 'counts': [], 'source': [], 'target': [], 'value': []}
+
+        codes, labels = pd.factorize(tags)
+        node_counts = np.bincount(codes, weights=weights[tags.index], minlength=len(labels)).astype(np.int64)
+
+        # Self-join tags on their list to enumerate pairs without Python loops
+        pairs = pd.DataFrame({'row': tags.index.to_numpy(), 'tag': codes}).drop_duplicates()
+        pairs = pairs.merge(pairs, on='row', suffixes=('_a', '_b'))
+        pairs = pairs[pairs['tag_a'] < pairs['tag_b']]
+        pairs['weight'] = weights[pairs['row'].to_numpy()]
+        edges = pairs.groupby(['tag_a', 'tag_b'])['weight'].sum()
+        edges = edges[edges >= min_count].sort_values(ascending=False, kind='stable')
+
+        return {
+            'labels': [str(label) for label in labels],
+            'counts': node_counts.tolist(),
+            'source': edges.index.get_level_values(0).tolist(),
+            'target': edges.index.get_level_values(1).tolist(),
+            'value': edges.to_numpy().tolist()
+        }
+
+    def compute_layout(self, graph):
+        """Compute force-directed (Fruchterman-Reingold) node positions."""
+        n = len(graph['labels'])
+        if n == 0:
+            return np.zeros((0, 2))
+
+        rng = np.random.default_rng(self.random_state)
+        pos = rng.uniform(-1, 1, size=(n, 2))
+        source = np.asarray(graph['source'], dtype=np.int64)
+        target = np.asarray(graph['target'], dtype=np.int64)
+        weight = np.log1p(np.asarray(graph['value'], dtype=float))
+
+        k = np.sqrt(4.0 / n)
+        temperature = 0.1
+        cooling = temperature / (self.layout_iterations + 1)
+
+        for _ in range(self.layout_iterations):
+            displacement = np.zeros((n, 2))
+
+            # Repulsion between all node pairs, computed in row blocks
+            for start in range(0, n, self.layout_block_size):
+                stop = min(start + self.layout_block_size, n)
+                dx = pos[start:stop, 0, None] - pos[None, :, 0]
+                dy = pos[start:stop, 1, None] - pos[None, :, 1]
+                repulsion = k * k / np.maximum(dx * dx + dy * dy, 1e-4)
+                displacement[start:stop, 0] += (dx * repulsion).sum(axis=1)
+                displacement[start:stop, 1] += (dy * repulsion).sum(axis=1)
+
+            # Attraction along edges
+            if len(source):
+                delta = pos[source] - pos[target]
+                distance = np.maximum(np.linalg.norm(delta, axis=1), 0.01)
+                force = delta * (distance * weight / k)[:, None]
+                np.add.at(displacement, source, -force)
+                np.add.at(displacement, target, force)
+
+            length = np.maximum(np.linalg.norm(displacement, axis=1), 0.01)
+            pos += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+            temperature -= cooling
+
+        # Normalize to [-1, 1] so the figure axes are stable
+        pos -= pos.mean(axis=0)
+        scale = np.abs(pos).max()
+        return pos / scale if scale > 0 else pos
+
+    def analyze(self, df, column='hashtags', min_count=1):
+        """Build the hashtag graph and attach precomputed layout positions."""
+        graph = self.build_graph(df, column, min_count)
+        layout = self.compute_layout(graph)
+        graph['x'] = layout[:, 0].round(4).tolist()
+        graph['y'] = layout[:, 1].round(4).tolist()
+        return graph
+
+    def save(self, graph, path):
+        """Serialize the graph arrays to JSON."""
+        with open(path, 'w') as f:
+            json.dump(graph, f)
+
+    @staticmethod
+    def load(path):
+        """Load a graph previously written by save()."""
+        with open(path, 'r') as f:
+            return json.load(f)
@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+from nltk.metrics import BigramAssocMeasures
+
+class PhraseMiner:
+    """Corpus-wide bigram/trigram collocation mining over token ids.
+
+    The corpus is encoded once into a flat token-id array; n-grams are packed
+    into int64 keys and counted with np.unique, so there is one streaming
+    pass and no per-phrase Python dictionaries. Only n-grams above min_count
+    are scored, using NLTK's PMI and likelihood-ratio association measures,
+    and only positively associated ones are kept.
+    Trigram keys are packed as vocab_size**3, which fits int64 for
+    vocabularies up to about two million tokens.
+    """
+
+    def __init__(self, min_count=5, max_phrases=50):
+        self.min_count = min_count
+        self.max_phrases = max_phrases
+
+    def _encode(self, df, text_column, weight_column=None):
+        """Flatten documents into token ids, document positions and per-token weights."""
+        split = df[text_column].fillna('').astype(str).str.split()
+        tokens = split.explode().dropna()
+        ids, vocab = pd.factorize(tokens)
+        # Documents by position, so frames with duplicate index labels work too
+        docs = np.repeat(np.arange(len(df)), split.str.len().to_numpy())
+        if weight_column is not None:
+            weights = df[weight_column].to_numpy(dtype=float)[docs]
+        else:
+            weights = np.ones(len(ids))
+        return ids.astype(np.int64), docs, weights, np.asarray(vocab, dtype=object)
+
+    def _ngram_starts(self, ids, docs, n):
+        """Start positions of all n-grams that stay within one document."""
+        if len(ids) < n:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.arange(len(ids) - n + 1)
+        return starts[docs[starts] == docs[starts + n - 1]]
+
+    def _count(self, keys, weights):
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return unique, np.bincount(inverse.ravel(), weights=weights)
+
+    def count_ngrams(self, df, text_column='processed_comment', weight_column=None):
+        """Count unigrams, bigrams and trigrams in one pass over the encoded corpus."""
+        ids, docs, weights, vocab = self._encode(df, text_column, weight_column)
+        v = np.int64(max(len(vocab), 1))
+
+        unigram_counts = np.bincount(ids, weights=weights, minlength=len(vocab))
+
+        bigram_starts = self._ngram_starts(ids, docs, 2)
+        bigram_keys = ids[bigram_starts] * v + ids[bigram_starts + 1]
+
+        trigram_starts = self._ngram_starts(ids, docs, 3)
+        first, middle, last = ids[trigram_starts], ids[trigram_starts + 1], ids[trigram_starts + 2]
+        trigram_keys = (first * v + middle) * v + last
+
+        return {
+            'vocab': vocab,
+            'ids': ids,
+            'docs': docs,
+            'weights': weights,
+            'unigrams': unigram_counts,
+            'bigrams': self._count(bigram_keys, weights[bigram_starts]),
+            'trigrams': self._count(trigram_keys, weights[trigram_starts]),
+            'bigram_positions': (bigram_starts, bigram_keys),
+            'trigram_positions': (trigram_starts, trigram_keys),
+            'total': float(weights.sum())
+        }
+
+    def _lookup(self, counted, keys):
+        """Counts for the given keys from a (sorted unique keys, counts) pair."""
+        unique, counts = counted
+        if len(unique) == 0:
+            return np.zeros(len(keys))
+        positions = np.minimum(np.searchsorted(unique, keys), len(unique) - 1)
+        return np.where(unique[positions] == keys, counts[positions], 0)
+
+    def score(self, counts):
+        """Score n-grams above min_count with PMI and likelihood ratio.
+
+        Trigrams are scored against their sub-bigrams: as the weaker of the two
+        splits (w1 w2 | w3 and w1 | w2 w3) treated as a bigram, so a strong
+        bigram plus an unrelated word does not outrank the bigram itself. Only
+        positively associated n-grams (pmi > 0) are kept.
+        """
+        vocab = counts['vocab']
+        v = np.int64(max(len(vocab), 1))
+        unigrams = counts['unigrams']
+        total = counts['total']
+        rows = []
+
+        # Repeated tokens ("so so", "restock restock") are emphasis, not phrases
+        keys, freq = counts['bigrams']
+        keep = (freq >= self.min_count) & (keys // v != keys % v)
+        for key, n_ii in zip(keys[keep], freq[keep]):
+            w1, w2 = divmod(int(key), int(v))
+            marginals = (unigrams[w1], unigrams[w2])
+            rows.append({
+                'phrase': f"{vocab[w1]} {vocab[w2]}",
+                'n': 2,
+                'count': int(round(n_ii)),
+                'pmi': BigramAssocMeasures.pmi(n_ii, marginals, total),
+                'likelihood_ratio': BigramAssocMeasures.likelihood_ratio(n_ii, marginals, total),
+                'key': int(key)
+            })
+
+        keys, freq = counts['trigrams']
+        keep = freq >= self.min_count
+        if keep.any():
+            first, rest = np.divmod(keys[keep], v * v)
+            middle, last = np.divmod(rest, v)
+            distinct = (first != middle) & (middle != last)
+            keys, freq, first, middle, last = (
+                keys[keep][distinct], freq[keep][distinct], first[distinct], middle[distinct], last[distinct]
+            )
+            n_iix = self._lookup(counts['bigrams'], first * v + middle)
+            n_xii = self._lookup(counts['bigrams'], middle * v + last)
+            for i, (key, n_iii) in enumerate(zip(keys, freq)):
+                splits = [(n_iix[i], unigrams[last[i]]), (unigrams[first[i]], n_xii[i])]
+                rows.append({
+                    'phrase': f"{vocab[first[i]]} {vocab[middle[i]]} {vocab[last[i]]}",
+                    'n': 3,
+                    'count': int(round(n_iii)),
+                    'pmi': min(BigramAssocMeasures.pmi(n_iii, split, total) for split in splits),
+                    'likelihood_ratio': min(BigramAssocMeasures.likelihood_ratio(n_iii, split, total)
+                                            for split in splits),
+                    'key': int(key)
+                })
+
+        columns = ['phrase', 'n', 'count', 'pmi', 'likelihood_ratio', 'key']
+        scored = pd.DataFrame(rows, columns=columns)
+        return scored[scored['pmi'] > 0].sort_values('likelihood_ratio', ascending=False, ignore_index=True)
+
+    def _group(self, codes, n_groups):
+        """Positions of each group's members, from one stable sort."""
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+
+    def window_counts(self, counts, tokens, bigrams, trigrams):
+        """Counts in the same layout as count_ngrams, restricted to a subset of the corpus.
+
+        tokens, bigrams and trigrams index the tokens and n-gram start positions
+        to keep (e.g. those of one time window); n-grams never cross
+        documents, so no re-encoding is needed.
+        """
+        weights = counts['weights']
+        bigram_starts, bigram_keys = counts['bigram_positions']
+        trigram_starts, trigram_keys = counts['trigram_positions']
+        bigram_starts, bigram_keys = bigram_starts[bigrams], bigram_keys[bigrams]
+        trigram_starts, trigram_keys = trigram_starts[trigrams], trigram_keys[trigrams]
+        return {
+            'vocab': counts['vocab'],
+            'unigrams': np.bincount(counts['ids'][tokens], weights=weights[tokens],
+                                    minlength=len(counts['vocab'])),
+            'bigrams': self._count(bigram_keys, weights[bigram_starts]),
+            'trigrams': self._count(trigram_keys, weights[trigram_starts]),
+            'total': float(weights[tokens].sum())
+        }
+
+    def mine(self, df, text_column='processed_comment', weight_column=None, time_window=None, top_n=10):
+        """Top phrases overall and, with time_window (e.g. '1D'), per window.
+
+        Returns (phrases, by_window): a DataFrame of the top scored phrases and
+        a dict mapping each window start to its top phrases. Each window is
+        pruned with min_count and scored on its own counts, so a phrase that
+        spikes in one window shows up there even if it is not a top phrase
+        overall. Per-window counts reuse the n-gram positions from the single pass.
+        """
+        counts = self.count_ngrams(df, text_column, weight_column)
+        phrases = self.score(counts).head(self.max_phrases)
+
+        by_window = {}
+        if time_window is not None and len(counts['ids']):
+            timestamps = df['timestamp']
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_convert(None)
+            windows = timestamps.dt.to_period(time_window).dt.start_time.dt.date
+            window_codes, window_labels = pd.factorize(windows, sort=True)
+
+            # Tokens and n-gram starts grouped by window (via their document) with one sort each
+            token_windows = window_codes[counts['docs']]
+            groups = zip(
+                self._group(token_windows, len(window_labels)),
+                self._group(token_windows[counts['bigram_positions'][0]], len(window_labels)),
+                self._group(token_windows[counts['trigram_positions'][0]], len(window_labels))
+            )
+            for label, (tokens, bigrams, trigrams) in zip(window_labels, groups):
+                scored = self.score(self.window_counts(counts, tokens, bigrams, trigrams))
+                if len(scored):
+                    by_window[str(label)] = scored.head(top_n)[['phrase', 'count']].to_dict(orient='records')
+
+        return phrases.drop(columns='key'), by_window
+
+    def phrases_for_keyword(self, phrases, keyword, top_n=10):
+        """Mined phrases containing the keyword as a token, most frequent first."""
+        contains = phrases['phrase'].str.split().apply(lambda tokens: keyword in tokens)
+        matching = phrases[contains].nlargest(top_n, 'count')
+        return [{'phrase': row['phrase'], 'count': int(row['count'])} for _, row in matching.iterrows()]
@@ -0,0 +1,192 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import coo_matrix
+
+NS_PER_HOUR = 3600 * 10**9
+
+class PostEngagementAnalyzer:
+    """Per-post engagement, topic mix and keywords, plus caption hashtag / comment topic association.
+
+    Comments are sorted once by (post, time); every per-post statistic is
+    then a segment reduction over that order (reduceat, bincount, sparse
+    products), so the cost grows with the number of comments, not posts.
+    Multi-valued results (topic mix, top keywords) are spread over a fixed
+    number of columns to keep the per-post table flat and compact.
+    """
+
+    # Time since a post's first comment at which the share of its comments is reported
+    DECAY_HOURS = [1, 6, 24, 72, 168]
+
+    def __init__(self, top_keywords=5, min_token_length=3, min_hashtag_posts=3):
+        self.top_keywords = top_keywords
+        self.min_token_length = min_token_length
+        # Hashtags on fewer posts than this are left out of the association table
+        self.min_hashtag_posts = min_hashtag_posts
+
+    def _sort(self, df):
+        """Post codes and UTC nanosecond timestamps, with the row order that groups posts in time order."""
+        codes, posts = pd.factorize(df['media_id'])
+        timestamps = df['timestamp']
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert('UTC')
+        timestamps = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        order = np.lexsort((timestamps, codes))
+        return order, codes[order], timestamps[order], np.asarray(posts).astype(str).astype(object)
+
+    def engagement(self, codes, timestamps, n_posts):
+        """Comment count, velocity and time-since-first-comment decay per post (codes sorted)."""
+        counts = np.bincount(codes, minlength=n_posts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        first = timestamps[starts]
+        last = timestamps[starts + counts - 1]
+        offsets = (timestamps - np.repeat(first, counts)) / NS_PER_HOUR
+
+        span_hours = (last - first) / NS_PER_HOUR
+        # Rows are in time order within each post, so the median offset sits in the middle of the segment
+        median_hours = (offsets[starts + (counts - 1) // 2] + offsets[starts + counts // 2]) / 2
+
+        table = pd.DataFrame({
+            'comments': counts.astype(np.int32),
+            'first_comment': pd.to_datetime(first, utc=True),
+            'last_comment': pd.to_datetime(last, utc=True),
+            'active_hours': span_hours.round(2),
+            # Comments per hour over the active span, counting at least one hour
+            'comments_per_hour': (counts / np.maximum(span_hours, 1.0)).round(3),
+            'median_hours_to_comment': median_hours.round(2)
+        })
+        for hours in self.DECAY_HOURS:
+            within = np.add.reduceat((offsets <= hours).astype(np.int32), starts)
+            table[f'share_within_{hours}h'] = (within / counts).round(3)
+        return table
+
+    def topic_counts(self, codes, topics, n_posts):
+        """Posts x topics matrix of comment counts."""
+        n_topics = int(topics.max()) + 1 if len(topics) else 0
+        flat = np.bincount(codes * n_topics + topics, minlength=n_posts * n_topics)
+        return flat.reshape(n_posts, n_topics)
+
+    def topic_mix(self, counts):
+        """Dominant topic and the share of each topic per post."""
+        totals = np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        shares = counts / totals
+        table = pd.DataFrame({
+            'dominant_topic': counts.argmax(axis=1).astype(np.int16),
+            'dominant_topic_share': shares.max(axis=1).round(3)
+        })
+        for topic in range(counts.shape[1]):
+            table[f'topic_{topic}_share'] = shares[:, topic].round(3)
+        return table
+
+    def keywords(self, texts, codes, n_posts):
+        """The most frequent comment tokens per post, as top_keyword_1..N columns.
+
+        Each distinct comment is tokenized once; (post, comment) pair counts
+        are then expanded to (post, token) counts with array indexing.
+        """
+        text_codes, unique_texts = pd.factorize(texts)
+        # Missing comments (code -1) contribute no tokens
+        has_text = text_codes >= 0
+        codes, text_codes = codes[has_text], text_codes[has_text]
+        split = pd.Series(np.asarray(unique_texts, dtype=object)).astype(str).str.split().explode().dropna()
+        token_codes, vocab = pd.factorize(split)
+        keep = (vocab.str.len() >= self.min_token_length)[token_codes]
+        token_texts = split.index.to_numpy()[keep]
+        token_codes = token_codes[keep]
+
+        # Tokens of each distinct text are contiguous (explode keeps order)
+        n_texts = len(unique_texts)
+        token_counts = np.bincount(token_texts, minlength=n_texts)
+        token_starts = np.concatenate([[0], np.cumsum(token_counts)[:-1]])
+
+        pair_keys, pair_counts = np.unique(codes.astype(np.int64) * n_texts + text_codes, return_counts=True)
+        pair_posts, pair_texts = np.divmod(pair_keys, n_texts)
+        repeats = token_counts[pair_texts]
+        pair_index = np.repeat(np.arange(len(pair_keys)), repeats)
+        within = np.arange(len(pair_index)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        tokens = token_codes[token_starts[pair_texts][pair_index] + within]
+
+        keys, inverse = np.unique(pair_posts[pair_index] * len(vocab) + tokens, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=pair_counts[pair_index])
+        posts, words = np.divmod(keys, len(vocab))
+
+        # Most frequent first within each post (ties alphabetically), then keep the first N
+        order = np.lexsort((np.asarray(vocab, dtype=object)[words].astype(str), -counts, posts))
+        posts, words = posts[order], words[order]
+        segment_starts = np.flatnonzero(np.r_[True, posts[1:] != posts[:-1]]) if len(posts) else np.zeros(0, dtype=np.int64)
+        rank = np.arange(len(posts)) - np.repeat(segment_starts, np.diff(np.r_[segment_starts, len(posts)]))
+        top = rank < self.top_keywords
+
+        table = np.full((n_posts, self.top_keywords), None, dtype=object)
+        table[posts[top], rank[top]] = np.asarray(vocab, dtype=object)[words[top]]
+        return pd.DataFrame(table, columns=[f'top_keyword_{rank}' for rank in range(1, self.top_keywords + 1)])
+
+    def hashtag_topic_association(self, hashtags, topic_counts):
+        """Which comment topics each caption hashtag's posts attract.
+
+        For every hashtag and topic: the comments on posts carrying the
+        hashtag that fall in the topic, their share of the hashtag's
+        comments, and the lift over the topic's overall share.
+        """
+        columns = ['hashtag', 'topic_id', 'posts', 'comments', 'share', 'lift']
+        tags = hashtags.explode().dropna()
+        if tags.empty or topic_counts.size == 0:
+            return pd.DataFrame(columns=columns)
+
+        pairs = pd.DataFrame({'post': tags.index.to_numpy(), 'tag': tags.to_numpy()}).drop_duplicates()
+        tag_codes, tag_labels = pd.factorize(pairs['tag'])
+        n_posts, n_topics = topic_counts.shape
+        post_tags = coo_matrix(
+            (np.ones(len(pairs)), (pairs['post'].to_numpy(), tag_codes)), shape=(n_posts, len(tag_labels))
+        ).tocsr()
+
+        tag_topics = np.asarray((post_tags.T @ topic_counts))
+        tag_posts = np.asarray(post_tags.sum(axis=0)).ravel()
+        tag_comments = tag_topics.sum(axis=1, keepdims=True)
+        topic_share = topic_counts.sum(axis=0) / max(topic_counts.sum(), 1)
+
+        share = tag_topics / np.maximum(tag_comments, 1)
+        lift = np.divide(share, topic_share, out=np.zeros_like(share), where=topic_share > 0)
+        table = pd.DataFrame({
+            'hashtag': np.repeat(np.asarray(tag_labels, dtype=object), n_topics),
+            'topic_id': np.tile(np.arange(n_topics), len(tag_labels)),
+            'posts': np.repeat(tag_posts, n_topics).astype(np.int32),
+            'comments': tag_topics.ravel().astype(np.int64),
+            'share': share.ravel().round(3),
+            'lift': lift.ravel().round(3)
+        }, columns=columns)
+        table = table[(table['posts'] >= self.min_hashtag_posts) & (table['comments'] > 0)]
+        return table.sort_values(['hashtag', 'lift'], ascending=[True, False], ignore_index=True)
+
+    def analyze(self, df):
+        """Per-post table (one row per media_id) and the hashtag/topic association table.
+
+        Comments without a media_id belong to no post and are left out.
+        """
+        df = df[df['media_id'].notna()]
+        order, codes, timestamps, posts = self._sort(df)
+        n_posts = len(posts)
+        if n_posts == 0:
+            return pd.DataFrame(columns=['media_id']), self.hashtag_topic_association(pd.Series(dtype=object),
+                                                                                     np.zeros((0, 0)))
+
+        parts = [pd.DataFrame({'media_id': posts}), self.engagement(codes, timestamps, n_posts)]
+
+        # Captions (and their hashtags) are per post; take them from each post's first row
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        first_rows = df.iloc[order[starts]]
+        if 'hashtags' in df.columns:
+            hashtags = pd.Series(first_rows['hashtags'].to_numpy(), index=np.arange(n_posts))
+            parts.append(pd.DataFrame({'caption_hashtags': hashtags.str.len().fillna(0).astype(np.int16)}))
+        else:
+            hashtags = pd.Series([[]] * n_posts)
+
+        topic_counts = np.zeros((n_posts, 0), dtype=np.int64)
+        if 'topic_id' in df.columns:
+            topic_counts = self.topic_counts(codes, df['topic_id'].to_numpy()[order].astype(np.int64), n_posts)
+            parts.append(self.topic_mix(topic_counts))
+
+        if 'processed_comment' in df.columns:
+            parts.append(self.keywords(df['processed_comment'].to_numpy()[order], codes, n_posts))
+
+        posts_table = pd.concat(parts, axis=1).sort_values('comments', ascending=False, ignore_index=True)
+        return posts_table, self.hashtag_topic_association(hashtags, topic_counts)
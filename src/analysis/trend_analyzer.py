@@ -1,33 +1,84 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
 from collections import Counter
-import spacy
 from datetime import datetime, timedelta
+import itertools
+import time
 import re
+from data_processing.nlp import load_spacy_model
+
+# scikit-learn and joblib are imported where they are used, so importing this
+# module (e.g. for TOPIC_ENGINES in the CLI) stays cheap
+TOPIC_ENGINES = ['lda', 'online_lda', 'nmf']
+
+# Simple sentiment word lists, shared with the live rolling aggregates
+POSITIVE_WORDS = frozenset(['good', 'great', 'excellent', 'amazing', 'love', 'best', 'perfect', 'wonderful', 'fantastic', 'awesome'])
+NEGATIVE_WORDS = frozenset(['bad', 'poor', 'terrible', 'worst', 'hate', 'awful', 'horrible', 'disappointing', 'useless', 'waste'])
+
+def make_topic_model(engine, n_topics, max_iter=10, random_state=42):
+    """Create an unfitted topic model for one of TOPIC_ENGINES."""
+    from sklearn.decomposition import LatentDirichletAllocation, NMF
+    if engine == 'lda':
+        return LatentDirichletAllocation(n_components=n_topics, random_state=random_state, max_iter=max_iter)
+    if engine == 'online_lda':
+        # Mini-batch variational updates; much faster than batch LDA on large corpora
+        return LatentDirichletAllocation(n_components=n_topics, random_state=random_state, max_iter=max_iter,
+                                         learning_method='online', batch_size=512)
+    if engine == 'nmf':
+        return NMF(n_components=n_topics, random_state=random_state, max_iter=max(max_iter, 200), init='nndsvda')
+    raise ValueError(f"Unknown topic engine: {engine}. Choose from {TOPIC_ENGINES}")
+
+def umass_coherence(components, binary_dtm, top_n=10):
+    """Mean UMass coherence of the topics' top words (higher is better)."""
+    doc_freq = np.asarray(binary_dtm.sum(axis=0)).ravel()
+    scores = []
+    for topic in components:
+        top = topic.argsort()[:-top_n - 1:-1]
+        co_doc_freq = (binary_dtm[:, top].T @ binary_dtm[:, top]).toarray()
+        # Each pair is conditioned on the higher-ranked word: log((D(w_i, w_j) + 1) / D(w_i)) for i < j
+        pairs = [(i, j) for i, j in itertools.combinations(range(len(top)), 2) if doc_freq[top[i]] > 0]
+        if pairs:
+            scores.append(np.mean([np.log((co_doc_freq[i, j] + 1) / doc_freq[top[i]]) for i, j in pairs]))
+    return float(np.mean(scores)) if scores else float('nan')
+
+def fit_topic_candidate(dtm, binary_dtm, engine, n_topics, max_iter=10):
+    """Fit one candidate model and score it; runs in a joblib worker."""
+    started = time.perf_counter()
+    model = make_topic_model(engine, n_topics, max_iter)
+    model.fit(dtm)
+    fit_seconds = time.perf_counter() - started
+    return {
+        'engine': engine,
+        'n_topics': n_topics,
+        'fit_seconds': round(fit_seconds, 3),
+        # Perplexity is only defined for LDA; NMF reports its reconstruction error instead
+        'perplexity': float(model.perplexity(dtm)) if engine != 'nmf' else None,
+        'reconstruction_error': float(model.reconstruction_err_) if engine == 'nmf' else None,
+        'coherence': umass_coherence(model.components_, binary_dtm)
+    }
 
 class TrendAnalyzer:
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, n_topics=5, engine='lda', max_iter=10):
+        from sklearn.feature_extraction.text import TfidfVectorizer
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2)  # Include both single words and bigrams
         )
-        self.lda = LatentDirichletAllocation(
-            n_components=5,  # Number of topics
-            random_state=42,
-            max_iter=10
-        )
+        self.n_topics = n_topics  # Number of topics
+        self.engine = engine
+        self.max_iter = max_iter
+        self.lda = make_topic_model(engine, n_topics, max_iter)
+        # Document-term matrix of the last corpus, shared by modeling and model selection
+        self._dtm_cache = None
         
         # Simple sentiment word lists
-        self.positive_words = set(['good', 'great', 'excellent', 'amazing', 'love', 'best', 'perfect', 'wonderful', 'fantastic', 'awesome'])
-        self.negative_words = set(['bad', 'poor', 'terrible', 'worst', 'hate', 'awful', 'horrible', 'disappointing', 'useless', 'waste'])
-        
+        self.positive_words = set(POSITIVE_WORDS)
+        self.negative_words = set(NEGATIVE_WORDS)
+
     def extract_keywords(self, text):
         """Extract key phrases from text using spaCy."""
-        doc = self.nlp(text)
+        doc = load_spacy_model()(text)
         keywords = []
         for chunk in doc.noun_chunks:
             keywords.append(chunk.text.lower())
@@ -60,12 +111,63 @@ class TrendAnalyzer:
         
         return pd.DataFrame(trends)
     
-    def perform_topic_modeling(self, df):
-        """Perform LDA topic modeling on comments."""
+    def _topic_documents(self, df, weight_column=None):
+        """Documents to model: cluster representatives when weighting, otherwise every comment."""
+        if weight_column is not None:
+            return df[df['is_representative']]
+        return df
+    
+    def build_document_term_matrix(self, docs, weight_column=None):
+        """TF-IDF document-term matrix, cached so repeated fits on one corpus vectorize once."""
+        key = (int(pd.util.hash_pandas_object(docs['processed_comment'], index=False).sum()),
+               len(docs), weight_column)
+        if self._dtm_cache is not None and self._dtm_cache[0] == key:
+            return self._dtm_cache[1]
+
+        dtm = self.vectorizer.fit_transform(docs['processed_comment'])
+        if weight_column is not None:
+            dtm = dtm.multiply(docs[weight_column].to_numpy()[:, None]).tocsr()
+        self._dtm_cache = (key, dtm)
+        return dtm
+    
+    def select_topic_model(self, df, candidates=(3, 5, 8, 10), engines=None, weight_column=None, n_jobs=-1):
+        """Fit candidate topic counts and engines in parallel and score each.
+
+        All candidates share one cached document-term matrix. Returns a
+        DataFrame with wall-clock fit time, perplexity (LDA engines),
+        reconstruction error (NMF) and UMass coherence, best coherence first.
+        """
+        from joblib import Parallel, delayed
+        docs = self._topic_documents(df, weight_column)
+        dtm = self.build_document_term_matrix(docs, weight_column)
+        binary_dtm = (dtm > 0).astype(np.int32).tocsc()
+
+        engines = engines or [self.engine]
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(fit_topic_candidate)(dtm, binary_dtm, engine, n_topics, self.max_iter)
+            for engine in engines for n_topics in candidates
+        )
+        return pd.DataFrame(results).sort_values('coherence', ascending=False).reset_index(drop=True)
+    
+    def configure_topic_model(self, engine, n_topics):
+        """Switch the engine and topic count used by perform_topic_modeling."""
+        self.engine = engine
+        self.n_topics = n_topics
+        self.lda = make_topic_model(engine, n_topics, self.max_iter)
+    
+    def perform_topic_modeling(self, df, weight_column=None):
+        """Perform topic modeling on comments with the configured engine.
+
+        With weight_column (e.g. 'cluster_size' from CommentDeduplicator) the
+        model is fit on cluster representatives only, each weighted by its
+        cluster size, and topics are assigned to every comment in the cluster.
+        """
+        docs = self._topic_documents(df, weight_column)
+
         # Create document-term matrix
-        dtm = self.vectorizer.fit_transform(df['processed_comment'])
+        dtm = self.build_document_term_matrix(docs, weight_column)
         
-        # Fit LDA model
+        # Fit topic model
         lda_output = self.lda.fit_transform(dtm)
         
         # Get feature names
@@ -81,7 +183,11 @@ class TrendAnalyzer:
             })
         
         # Add topic distribution to the dataframe
-        df['topic_id'] = lda_output.argmax(axis=1)
+        if weight_column is not None:
+            cluster_topics = pd.Series(lda_output.argmax(axis=1), index=docs['cluster_id'].to_numpy())
+            df['topic_id'] = df['cluster_id'].map(cluster_topics).to_numpy()
+        else:
+            df['topic_id'] = lda_output.argmax(axis=1)
         
         return topics, df
     
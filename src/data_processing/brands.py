@@ -0,0 +1,26 @@
+import json
+import os
+
+# Per-brand settings live next to the source tree unless BRAND_CONFIG points elsewhere
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'config', 'brands.json'
+)
+
+def load_brand_config(brand, path=None):
+    """Load the configuration for a brand, with empty defaults for unknown brands."""
+    path = path or os.getenv('BRAND_CONFIG', DEFAULT_CONFIG_PATH)
+    config = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            config = json.load(f).get(brand, {})
+
+    return {
+        'brand': brand,
+        'display_name': config.get('display_name', brand),
+        'stop_words': [word.lower() for word in config.get('stop_words', [])],
+        # Excluded from the keyword analysis only (product and campaign vocabulary)
+        'keyword_stop_words': [word.lower() for word in config.get('keyword_stop_words', [])],
+        # Raw data used for background refreshes
+        'data_path': config.get('data_path')
+    }
@@ -0,0 +1,79 @@
+import pandas as pd
+import numpy as np
+
+class CommentIndex:
+    """Comments kept sorted by timestamp, with a media_id -> row-range index.
+
+    Date-range slices are found with binary search on the sorted timestamps,
+    and a single post's comments are a contiguous range of a secondary
+    ordering grouped by media_id (still in time order within the post), so
+    filtering costs time proportional to the slice rather than a full scan.
+    """
+
+    def __init__(self, df, time_column='timestamp', media_column='media_id'):
+        self.time_column = time_column
+        self.media_column = media_column
+        self.df = df.sort_values(time_column, kind='stable').reset_index(drop=True)
+
+        timestamps = self.df[time_column]
+        self.tz = timestamps.dt.tz
+        if self.tz is not None:
+            timestamps = timestamps.dt.tz_convert('UTC')
+        self.timestamps = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        # Rows grouped by media_id; a stable sort keeps each post's rows in time order
+        if media_column in self.df.columns:
+            codes, uniques = pd.factorize(self.df[media_column].astype(str), sort=True)
+            self.media_order = np.argsort(codes, kind='stable')
+            boundaries = np.searchsorted(codes[self.media_order], np.arange(len(uniques) + 1))
+            self.media_ranges = {
+                media_id: (boundaries[i], boundaries[i + 1]) for i, media_id in enumerate(uniques)
+            }
+        else:
+            self.media_order = np.arange(len(self.df))
+            self.media_ranges = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def _to_ns(self, value):
+        """Convert a date/timestamp bound to UTC nanoseconds comparable with the index."""
+        value = pd.Timestamp(value)
+        if value.tzinfo is None and self.tz is not None:
+            value = value.tz_localize(self.tz)
+        elif value.tzinfo is not None and self.tz is None:
+            value = value.tz_convert('UTC').tz_localize(None)
+        if value.tzinfo is not None:
+            value = value.tz_convert('UTC')
+        return value.value
+
+    def time_bounds(self):
+        """First and last timestamp in the index."""
+        if len(self.df) == 0:
+            return None, None
+        column = self.df[self.time_column]
+        return column.iloc[0], column.iloc[-1]
+
+    def _bounds(self, timestamps, start, end):
+        """Binary-search [start, end) in a sorted timestamp array."""
+        lo = np.searchsorted(timestamps, self._to_ns(start), side='left') if start is not None else 0
+        hi = np.searchsorted(timestamps, self._to_ns(end), side='left') if end is not None else len(timestamps)
+        return lo, hi
+
+    def positions(self, start=None, end=None, media_id=None):
+        """Row positions for comments in [start, end), optionally restricted to one post."""
+        if media_id is None:
+            return np.arange(*self._bounds(self.timestamps, start, end))
+        if str(media_id) not in self.media_ranges:
+            return np.arange(0)
+        first, last = self.media_ranges[str(media_id)]
+        rows = self.media_order[first:last]
+        lo, hi = self._bounds(self.timestamps[rows], start, end)
+        return rows[lo:hi]
+
+    def slice(self, start=None, end=None, media_id=None):
+        """Comments in [start, end), optionally restricted to one post."""
+        if media_id is None:
+            lo, hi = self._bounds(self.timestamps, start, end)
+            return self.df.iloc[lo:hi]
+        return self.df.iloc[self.positions(start, end, media_id)]
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import re
+import zlib
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+class CommentDeduplicator:
+    """Collapse near-identical comments into clusters with MinHash and LSH banding.
+
+    Adds ``cluster_id``, ``cluster_size``, ``is_representative`` and
+    ``is_spam`` columns. Expensive NLP stages can then run on the
+    representative rows only and use ``cluster_size`` as a weight, so
+    frequencies still count every comment.
+    """
+
+    def __init__(self, num_perm=128, bands=32, shingle_size=3, similarity_threshold=0.7,
+                 spam_cluster_size=5, random_state=42, batch_shingles=1 << 16):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        # Minimum estimated Jaccard similarity for an LSH candidate pair to be merged
+        self.similarity_threshold = similarity_threshold
+        # Clusters at least this large are reported as spam
+        self.spam_cluster_size = spam_cluster_size
+        # Shingles hashed per batch; each batch holds a num_perm x batch_shingles uint64 matrix,
+        # so memory stays bounded however long the comments are
+        self.batch_shingles = batch_shingles
+
+        rng = np.random.default_rng(random_state)
+        # Multiply-shift hash family: h(x) = (a * x + b) >> 32 with odd a, wrapping in 64 bits
+        self.hash_a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.band_mix = rng.integers(1, 1 << 63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+    def normalize(self, text):
+        """Normalize a comment so trivial variations (case, mentions, spacing) do not matter."""
+        if not isinstance(text, str):
+            return ""
+        text = text.lower()
+        text = re.sub(r'@[\w.]+', '@', text)
+        text = re.sub(r'http\S+|www\S+', '', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def shingles(self, text):
+        """Hashed character shingles of a normalized comment."""
+        if len(text) <= self.shingle_size:
+            return [zlib.crc32(text.encode('utf-8'))] if text else []
+        return list({
+            zlib.crc32(text[i:i + self.shingle_size].encode('utf-8'))
+            for i in range(len(text) - self.shingle_size + 1)
+        })
+
+    def _batches(self, texts):
+        """Yield (start, shingle lists) for consecutive texts holding about batch_shingles shingles."""
+        start, batch, total = 0, [], 0
+        for i, text in enumerate(texts):
+            shingles = self.shingles(text)
+            if batch and total + len(shingles) > self.batch_shingles:
+                yield start, batch
+                start, batch, total = i, [], 0
+            batch.append(shingles)
+            total += len(shingles)
+        if batch:
+            yield start, batch
+
+    def signatures(self, texts):
+        """MinHash signatures (n_texts x num_perm); texts without shingles get all-max rows."""
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start, batch in self._batches(texts):
+            lengths = np.array([len(s) for s in batch])
+            nonempty = np.flatnonzero(lengths)
+            if len(nonempty) == 0:
+                continue
+            values = np.fromiter((h for s in batch for h in s), dtype=np.uint64, count=lengths.sum())
+            offsets = np.concatenate([[0], np.cumsum(lengths[nonempty])[:-1]])
+            # Hash every shingle under a block of permutations (perm-major), then min per document;
+            # the block only shrinks below num_perm for a single text longer than batch_shingles
+            perm_block = max(1, self.num_perm * self.batch_shingles // len(values))
+            for perm in range(0, self.num_perm, perm_block):
+                a = self.hash_a[perm:perm + perm_block, None]
+                b = self.hash_b[perm:perm + perm_block, None]
+                hashed = (a * values[None, :] + b) >> np.uint64(32)
+                signatures[start + nonempty, perm:perm + perm_block] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        return signatures
+
+    def cluster(self, texts):
+        """Cluster label for each text; near-duplicates share a label."""
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        signatures = self.signatures(texts)
+        empty = signatures[:, 0] == np.iinfo(np.uint64).max
+
+        sources, targets = [], []
+        for band in range(self.bands):
+            rows = signatures[:, band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            # Fold the band's rows into one 64-bit key (wrapping arithmetic) and bucket on it
+            keys = (rows * self.band_mix[None, :]).sum(axis=1)
+            _, buckets = np.unique(keys, return_inverse=True)
+            # Link every member of a bucket to the bucket's first member
+            order = np.argsort(buckets, kind='stable')
+            sorted_buckets = buckets[order]
+            first = np.r_[0, np.flatnonzero(np.diff(sorted_buckets)) + 1]
+            leaders = np.repeat(order[first], np.diff(np.r_[first, n]))
+            candidates = leaders != order
+            sources.append(order[candidates])
+            targets.append(leaders[candidates])
+
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        pairs = np.unique(np.stack([sources, targets], axis=1), axis=0)
+        if len(pairs):
+            # Keep candidates whose signatures agree enough (estimated Jaccard similarity)
+            similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+            keep = (similarity >= self.similarity_threshold) & ~empty[pairs[:, 0]] & ~empty[pairs[:, 1]]
+            pairs = pairs[keep]
+
+        graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+    def deduplicate(self, df, text_column='comment_text'):
+        """Assign near-duplicate clusters and representatives to each comment."""
+        df = df.copy()
+        normalized = df[text_column].apply(self.normalize)
+
+        # Exact duplicates after normalization are collapsed before hashing
+        codes, unique_texts = pd.factorize(normalized)
+        labels = self.cluster(list(unique_texts))
+
+        cluster_ids = labels[codes]
+        df['cluster_id'] = cluster_ids
+        df['cluster_size'] = df.groupby('cluster_id')['cluster_id'].transform('size')
+        df['is_representative'] = ~df.duplicated('cluster_id')
+
+        # Large clusters and comments with no words (only tags, mentions or emoji) count as spam
+        no_words = ~normalized.str.contains(r'[a-z]{2,}', regex=True)
+        df['is_spam'] = (df['cluster_size'] >= self.spam_cluster_size) | no_words
+        return df
+
+    def spam_report(self, df, text_column='comment_text', top_n=20):
+        """Summarize spam volume and the largest duplicate clusters."""
+        representatives = df[df['is_representative']]
+        largest = representatives.nlargest(top_n, 'cluster_size')
+        return {
+            'total_comments': int(len(df)),
+            'unique_clusters': int(len(representatives)),
+            'duplicate_comments': int(len(df) - len(representatives)),
+            'spam_comments': int(df['is_spam'].sum()),
+            'spam_rate': float(df['is_spam'].mean()) if len(df) else 0.0,
+            'top_clusters': [
+                {'text': row[text_column], 'count': int(row['cluster_size']), 'is_spam': bool(row['is_spam'])}
+                for _, row in largest.iterrows()
+            ]
+        }
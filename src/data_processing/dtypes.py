@@ -0,0 +1,114 @@
+import sys
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Arrow list of strings: one contiguous buffer per column instead of a Python list per row
+STRING_LIST = pd.ArrowDtype(pa.list_(pa.string()))
+
+# Target dtype per processed column; columns missing from a frame are skipped.
+# Captions repeat on every comment of a post, so they are stored once per post
+# as categories; free text uses Arrow-backed strings and the per-comment
+# feature lists Arrow lists instead of Python objects.
+DTYPE_PLAN = {
+    'media_id': 'category',
+    'day_of_week': pd.CategoricalDtype(DAYS_OF_WEEK, ordered=True),
+    'media_caption': 'category',
+    'processed_caption': 'category',
+    'comment_text': 'string[pyarrow]',
+    'processed_comment': 'string[pyarrow]',
+    'hour': 'int8',
+    'comment_length': 'int32',
+    'topic_id': 'int16',
+    'cluster_id': 'int32',
+    'cluster_size': 'int32',
+    'url_count': 'int16',
+    'hashtag_count': 'int16',
+    'mention_count': 'int16',
+    'emoji_count': 'int16',
+    'comment_hashtags': STRING_LIST,
+    'mentions': STRING_LIST,
+    'emojis': STRING_LIST,
+    'urls': STRING_LIST
+}
+
+# List columns derived from the caption: every comment with the same caption
+# shares one list object, and storage keeps them once per caption
+CAPTION_LIST_COLUMNS = ['hashtags']
+
+def _fits(series, dtype):
+    """Whether an integer/float column can be cast to dtype without NaNs or overflow."""
+    if series.isna().any():
+        return False
+    if len(series) == 0:
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= series.min() and series.max() <= info.max
+
+def optimize_dtypes(df, plan=None):
+    """Cast the processed comment columns to compact dtypes in place and return df.
+
+    Integer columns are only narrowed when every value fits; columns that are
+    already in the target dtype are left alone, so this is cheap to call on
+    frames read back from parquet.
+    """
+    plan = DTYPE_PLAN if plan is None else plan
+    for column, dtype in plan.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if isinstance(dtype, str) and dtype.startswith('int'):
+            if series.dtype != dtype and pd.api.types.is_numeric_dtype(series) and _fits(series, dtype):
+                df[column] = series.astype(dtype)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            # Fixed categories (e.g. weekdays in order); values outside them become NaN
+            if series.dtype != dtype:
+                df[column] = series.astype(dtype)
+        elif dtype == 'category':
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype('category')
+            # Ids read from CSV are numbers; the dashboard matches them as strings
+            if not pd.api.types.is_object_dtype(series.cat.categories):
+                series = series.cat.rename_categories(series.cat.categories.astype(str))
+            df[column] = series
+        elif series.dtype != dtype:
+            df[column] = series.astype(dtype)
+    for column in CAPTION_LIST_COLUMNS:
+        if column in df.columns and 'media_caption' in df.columns:
+            df[column] = share_by_caption(df[column], df['media_caption'])
+    return df
+
+def caption_keys(captions):
+    """Captions as plain strings (missing ones as ''), for keying caption-derived columns."""
+    return captions.astype(object).fillna('').astype(str).to_numpy()
+
+def share_by_caption(values, captions):
+    """values with every row of the same caption referencing the first such row's object."""
+    codes, _ = pd.factorize(caption_keys(captions))
+    _, first = np.unique(codes, return_index=True)
+    return pd.Series(values.to_numpy(dtype=object)[first][codes], index=values.index, dtype=object)
+
+def _column_bytes(df):
+    """Deep memory per column, counting an object shared by several rows once."""
+    usage = df.memory_usage(index=False, deep=True)
+    for column in df.columns:
+        if pd.api.types.is_object_dtype(df[column].dtype):
+            distinct = {id(value): value for value in df[column]}
+            usage[column] = df[column].memory_usage(index=False) + sum(map(sys.getsizeof, distinct.values()))
+    return usage
+
+def memory_report(before, after):
+    """Per-column memory (bytes, including object contents, shared objects once) before and after optimize_dtypes."""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': _column_bytes(before),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': _column_bytes(after)
+    })
+    report.loc['TOTAL'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    report[['bytes_before', 'bytes_after']] = report[['bytes_before', 'bytes_after']].astype(np.int64)
+    report['saved_pct'] = (100 * (1 - report['bytes_after'] / report['bytes_before'].where(report['bytes_before'] > 0))).round(1)
+    report['bytes_per_row'] = (report['bytes_after'] / max(len(after), 1)).round(1)
+    return report
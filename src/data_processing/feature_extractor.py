@@ -0,0 +1,75 @@
+import pandas as pd
+import numpy as np
+import re
+
+# Emoji code point ranges (pictographs, symbols, dingbats, flags), with optional
+# skin tone modifier and variation selector
+EMOJI = (
+    r'[\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF'
+    r'\U0001F900-\U0001F9FF\U0001FA70-\U0001FAFF\U0001F1E6-\U0001F1FF'
+    r'☀-⛿✀-➿⭐❤]'
+    r'[\U0001F3FB-\U0001F3FF]?️?'
+)
+
+class SocialFeatureExtractor:
+    """Extract hashtags, @mentions, emoji and URLs in a single regex pass.
+
+    All four features come from one compiled alternation run once over the
+    whole column (joined into a single string), instead of one pass per
+    feature and per row.
+    URLs are matched first so '#' fragments and '@' inside links are not
+    counted as hashtags or mentions. Chained hashtags ('#treehut#scrub')
+    match as one run and are split into separate tags.
+    """
+
+    FEATURES = ['url', 'hashtag', 'mention', 'emoji']
+
+    def __init__(self):
+        self.pattern = re.compile(
+            r'(?P<url>https?://\S+|www\.\S+)'
+            r'|(?:^|(?<=[^\w&]))#(?P<hashtag>\w+(?:#\w+)*)'
+            r'|(?:^|(?<=[^\w.]))@(?P<mention>[\w.]*\w)'
+            rf'|(?P<emoji>{EMOJI})'
+        )
+
+    def split_hashtags(self, match):
+        """Lowercased tags of a hashtag match; chained tags arrive as 'a#b'."""
+        return match.lower().split('#')
+
+    def extract(self, series):
+        """Feature lists and counts for every row of a text column.
+
+        Returns a DataFrame indexed like series with list columns 'urls',
+        'hashtags', 'mentions', 'emojis' and the matching '*_count' columns.
+        """
+        texts = [value if isinstance(value, str) else '' for value in series]
+        # Scan the whole column as one string and map matches back to rows by offset
+        starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        joined = '\n'.join(texts)
+
+        kinds, values, positions = [], [], []
+        for match in self.pattern.finditer(joined):
+            kinds.append(match.lastgroup)
+            values.append(match.group(match.lastgroup))
+            positions.append(match.start())
+        rows = np.searchsorted(starts, np.asarray(positions, dtype=np.int64), side='right') - 1
+
+        lists = {feature: [[] for _ in texts] for feature in self.FEATURES}
+        for kind, value, row in zip(kinds, values, rows.tolist()):
+            if kind == 'hashtag':
+                lists[kind][row].extend(self.split_hashtags(value))
+            else:
+                lists[kind][row].append(value.lower() if kind == 'mention' else value)
+
+        features = pd.DataFrame(index=series.index)
+        for feature in self.FEATURES:
+            features[f"{feature}s"] = pd.Series(lists[feature], index=series.index, dtype=object)
+            features[f"{feature}_count"] = np.fromiter(map(len, lists[feature]), dtype=np.int32, count=len(texts))
+        return features
+
+    def extract_unique(self, series):
+        """Like extract(), but scans each distinct value once (e.g. captions repeated per comment)."""
+        uniques = series.drop_duplicates()
+        features = self.extract(uniques)
+        features.index = uniques.to_numpy()
+        return features.reindex(series.to_numpy()).set_axis(series.index)
@@ -0,0 +1,7 @@
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def load_spacy_model(name='en_core_web_sm'):
+    """Load a spaCy pipeline on first use and share it between all analyzers."""
+    import spacy
+    return spacy.load(name)
@@ -4,12 +4,11 @@ from datetime import datetime
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
-import spacy
 import re
+from data_processing.feature_extractor import SocialFeatureExtractor
 
 class DataProcessor:
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, brand_stop_words=None):
         # Common words to exclude
         self.stop_words = set([
             'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
@@ -22,19 +21,11 @@ class DataProcessor:
             'than', 'then', 'now', 'look', 'only', 'come', 'its', 'over', 'think', 'also',
             'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first', 'well', 'way',
             'even', 'new', 'want', 'because', 'any', 'these', 'give', 'day', 'most', 'us',
-            # Custom stop words for this project
-            'treehut', 'tree', 'love', 'need', 'zulu'
         ])
-        
-    def extract_hashtags(self, text):
-        """Extract hashtags from text."""
-        if not isinstance(text, str):
-            return []
-        # Find all hashtags (words starting with #)
-        hashtags = re.findall(r'#\w+', text)
-        # Remove the # symbol and convert to lowercase
-        return [tag[1:].lower() for tag in hashtags]
-        
+        # Brand-specific stop words come from the brand configuration
+        self.stop_words.update(brand_stop_words or [])
+        self.feature_extractor = SocialFeatureExtractor()
+
     def load_data(self, file_path):
         """Load the raw data from CSV file."""
         return pd.read_csv(file_path)
@@ -60,6 +51,12 @@ class DataProcessor:
         
         return ' '.join(tokens)
     
+    def apply_unique(self, series, func):
+        """Apply func once per distinct value; repeated comments and captions are common."""
+        uniques = series.drop_duplicates()
+        results = pd.Series([func(value) for value in uniques], index=uniques.to_numpy(), dtype=object)
+        return series.map(results)
+    
     def process_data(self, df):
         """Process the entire dataset."""
         # Try different timestamp parsing approaches
@@ -75,11 +72,19 @@ class DataProcessor:
                     df['timestamp'] = pd.to_datetime(df['timestamp'], format='%Y-%m-%d %H:%M:%S.%f%z')
         
         # Preprocess text columns
-        df['processed_comment'] = df['comment_text'].apply(self.preprocess_text)
-        df['processed_caption'] = df['media_caption'].apply(self.preprocess_text)
+        df['processed_comment'] = self.apply_unique(df['comment_text'], self.preprocess_text)
+        df['processed_caption'] = self.apply_unique(df['media_caption'], self.preprocess_text)
         
-        # Extract hashtags
-        df['hashtags'] = df['media_caption'].apply(self.extract_hashtags)
+        # Extract hashtags, mentions, emoji and URLs in one scan per column
+        caption_features = self.feature_extractor.extract_unique(df['media_caption'])
+        comment_features = self.feature_extractor.extract(df['comment_text'])
+        df['hashtags'] = caption_features['hashtags']
+        df['comment_hashtags'] = comment_features['hashtags']
+        df['mentions'] = comment_features['mentions']
+        df['emojis'] = comment_features['emojis']
+        df['urls'] = comment_features['urls']
+        for feature in SocialFeatureExtractor.FEATURES:
+            df[f'{feature}_count'] = comment_features[f'{feature}_count']
         
         # Extract additional features
         df['comment_length'] = df['comment_text'].str.len()
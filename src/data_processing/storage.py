@@ -0,0 +1,202 @@
+import pandas as pd
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from data_processing.dtypes import CAPTION_LIST_COLUMNS, caption_keys
+
+class PartitionedStore:
+    """Pipeline outputs partitioned by brand and comment date.
+
+    Layout under the output root::
+
+        brand=<brand>/
+            comments/date=<YYYY-MM-DD>/*.parquet
+            caption_lists.parquet
+            manifest.json
+            topics.json, keyword_analysis.csv, ...
+
+    Each brand lives in its own directory, so reading one brand never touches
+    another brand's files, and date filters are pushed down to the parquet
+    reader so only the matching date partitions are opened.
+
+    Runs can be staged into ``.versions/`` and published by atomically
+    repointing the ``brand=<brand>`` symlink, so readers always see either
+    the previous or the new complete run.
+    """
+
+    # Published versions kept per brand, so in-flight reads of the previous one finish
+    KEEP_VERSIONS = 2
+
+    def __init__(self, root='output'):
+        self.root = root
+
+    def brand_dir(self, brand):
+        return os.path.join(self.root, f"brand={brand}")
+
+    def comments_dir(self, brand):
+        return os.path.join(self.brand_dir(brand), "comments")
+
+    def artifact_path(self, brand, name):
+        return os.path.join(self.brand_dir(brand), name)
+
+    def list_brands(self):
+        """Brands that have a completed manifest under the output root."""
+        if not os.path.isdir(self.root):
+            return []
+        brands = []
+        for entry in sorted(os.listdir(self.root)):
+            if entry.startswith("brand=") and ".tmp-" not in entry and os.path.exists(os.path.join(self.root, entry, "manifest.json")):
+                brands.append(entry[len("brand="):])
+        return brands
+
+    def version(self, brand):
+        """Version token for a brand's outputs (manifest modification time)."""
+        try:
+            return os.stat(self.artifact_path(brand, "manifest.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    def write_comments(self, brand, df):
+        """Replace the brand's comment partitions with df, partitioned by date.
+
+        Caption-derived list columns (CAPTION_LIST_COLUMNS) are written once
+        per caption to caption_lists.parquet instead of on every comment.
+        """
+        path = self.comments_dir(brand)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+
+        caption_columns = [column for column in CAPTION_LIST_COLUMNS if column in df.columns]
+        if caption_columns and 'media_caption' in df.columns:
+            captions = pd.DataFrame({'caption': caption_keys(df['media_caption']),
+                                     **{column: df[column].to_numpy(dtype=object) for column in caption_columns}})
+            self.write_table(brand, "caption_lists.parquet", captions.drop_duplicates('caption'))
+            df = df.drop(columns=caption_columns)
+
+        df = df.copy()
+        df['date'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+        df.to_parquet(path, partition_cols=['date'], index=False)
+        return sorted(df['date'].unique().tolist())
+
+    def read_comments(self, brand, start_date=None, end_date=None, columns=None, filters=None):
+        """Read a brand's comments, opening only partitions within [start_date, end_date]."""
+        predicates = list(filters or [])
+        if start_date is not None:
+            predicates.append(('date', '>=', pd.Timestamp(start_date).strftime('%Y-%m-%d')))
+        if end_date is not None:
+            predicates.append(('date', '<=', pd.Timestamp(end_date).strftime('%Y-%m-%d')))
+
+        # Caption-derived lists are joined back from caption_lists.parquet by caption
+        caption_path = self.artifact_path(brand, "caption_lists.parquet")
+        caption_columns = []
+        read_columns = columns
+        if os.path.exists(caption_path):
+            caption_columns = [column for column in CAPTION_LIST_COLUMNS if columns is None or column in columns]
+            if columns is not None and caption_columns:
+                read_columns = [column for column in columns if column not in caption_columns]
+                read_columns += [] if 'media_caption' in read_columns else ['media_caption']
+
+        df = pd.read_parquet(self.comments_dir(brand), columns=read_columns, filters=predicates or None)
+        if caption_columns:
+            lists = self.read_table(brand, "caption_lists.parquet").set_index('caption')
+            keys = caption_keys(df['media_caption'])
+            for column in caption_columns:
+                # Rows of one caption share its list object
+                df[column] = lists[column].reindex(keys).to_numpy(dtype=object)
+            if columns is not None and 'media_caption' not in columns:
+                df = df.drop(columns='media_caption')
+        if 'date' in df.columns and (columns is None or 'date' not in columns):
+            df = df.drop(columns='date')
+        return df
+
+    def write_json(self, brand, name, data):
+        os.makedirs(self.brand_dir(brand), exist_ok=True)
+        with open(self.artifact_path(brand, name), "w") as f:
+            json.dump(data, f, indent=2, default=str)
+
+    def read_json(self, brand, name):
+        with open(self.artifact_path(brand, name), "r") as f:
+            return json.load(f)
+
+    def write_table(self, brand, name, df):
+        """Write a small per-brand table (e.g. one row per post) as a single parquet file."""
+        os.makedirs(self.brand_dir(brand), exist_ok=True)
+        df.to_parquet(self.artifact_path(brand, name), index=False)
+
+    def read_table(self, brand, name, columns=None):
+        return pd.read_parquet(self.artifact_path(brand, name), columns=columns)
+
+    def write_manifest(self, brand, dates, row_count, topic_settings=None):
+        """Mark the brand's outputs as complete; written last so readers see whole runs.
+
+        topic_settings records the run_pipeline topic arguments, so background
+        refreshes rebuild the topics the way the brand was published.
+        """
+        self.write_json(brand, "manifest.json", {
+            'brand': brand,
+            'written_at': datetime.now().isoformat(),
+            'rows': int(row_count),
+            'dates': dates,
+            'topic_settings': topic_settings or {}
+        })
+
+    def topic_settings(self, brand):
+        """Topic arguments of the brand's published run, or {} if there is none."""
+        try:
+            return self.read_json(brand, "manifest.json").get('topic_settings', {})
+        except OSError:
+            return {}
+
+    def stage(self, brand):
+        """Create a fresh store for writing a new version of a brand's outputs."""
+        token = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        staging = PartitionedStore(os.path.join(self.root, ".versions", f"brand={brand}", token))
+        os.makedirs(staging.brand_dir(brand), exist_ok=True)
+        return staging
+
+    def carry_over(self, brand, source):
+        """Seed this (staged) store with the brand's current outputs from source.
+
+        Comment partitions are hard-linked rather than copied (write_comments
+        replaces the directory instead of writing into it); the small
+        artifacts are copied so rewriting them never touches the published files.
+        """
+        current = os.path.realpath(source.brand_dir(brand))
+        shutil.rmtree(self.brand_dir(brand))
+        shutil.copytree(current, self.brand_dir(brand), ignore=shutil.ignore_patterns("comments"))
+        shutil.copytree(os.path.join(current, "comments"), self.comments_dir(brand), copy_function=os.link)
+        # The new manifest is written when the staged version is complete
+        os.remove(self.artifact_path(brand, "manifest.json"))
+
+    def discard(self, staging):
+        """Remove a staged version that will not be published (e.g. after a failed run)."""
+        shutil.rmtree(staging.root, ignore_errors=True)
+
+    def publish(self, brand, staging):
+        """Atomically make a staged version the brand's current outputs."""
+        link = self.brand_dir(brand)
+        target = os.path.relpath(staging.brand_dir(brand), self.root)
+
+        # Outputs written before versioning are a plain directory; move them aside once
+        if os.path.isdir(link) and not os.path.islink(link):
+            legacy = self.stage(brand)
+            shutil.rmtree(legacy.brand_dir(brand))
+            os.replace(link, legacy.brand_dir(brand))
+
+        tmp_link = f"{link}.tmp-{uuid.uuid4().hex[:8]}"
+        os.symlink(target, tmp_link)
+        os.replace(tmp_link, link)
+        self._prune_versions(brand)
+
+    def _prune_versions(self, brand):
+        """Remove staged versions beyond KEEP_VERSIONS, never touching the current one."""
+        versions_dir = os.path.join(self.root, ".versions", f"brand={brand}")
+        current = os.path.realpath(self.brand_dir(brand))
+        versions = sorted(os.listdir(versions_dir), reverse=True)
+        for token in versions[self.KEEP_VERSIONS:]:
+            path = os.path.join(versions_dir, token)
+            if os.path.realpath(os.path.join(path, f"brand={brand}")) != current:
+                shutil.rmtree(path, ignore_errors=True)
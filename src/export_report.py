@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+from data_processing.storage import PartitionedStore
+
+def main():
+    output_path = os.getenv('OUTPUT_PATH', 'output')
+
+    parser = argparse.ArgumentParser(description="Export static reports from the pipeline outputs")
+    parser.add_argument("--output", type=str, default=output_path, help="Pipeline output directory to read from")
+    parser.add_argument("--brands", type=str,
+                        help="Comma-separated brands to export (default: every brand with published outputs)")
+    parser.add_argument("--report-dir", type=str, default="reports", help="Directory to write the reports to")
+    parser.add_argument("--formats", type=str, default="html,png,pdf",
+                        help="Comma-separated formats: html, png, pdf (PNG/PDF need kaleido)")
+    parser.add_argument("--workers", type=int, help="Render processes (default: one per CPU)")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Rendered image cache (default: <report-dir>/.cache)")
+    args = parser.parse_args()
+
+    store = PartitionedStore(args.output)
+    brands = [brand.strip() for brand in args.brands.split(',')] if args.brands else store.list_brands()
+    missing = [brand for brand in brands if store.version(brand) is None]
+    if missing:
+        parser.error(f"No published outputs for: {', '.join(missing)}")
+    if not brands:
+        print(f"No brands with published outputs under {args.output}")
+        return
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in ('html', 'png', 'pdf')]
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(unknown)}. Choose from html, png, pdf")
+
+    # Imported after argument parsing so --help and errors stay fast
+    from visualization.report import ReportExporter
+    exporter = ReportExporter(
+        cache_dir=args.cache_dir or os.path.join(args.report_dir, ".cache"),
+        formats=formats,
+        max_workers=args.workers
+    )
+
+    started = time.perf_counter()
+    stats = exporter.export(store, brands, args.report_dir)
+    print(f"Exported {stats['brands']} brand report(s) to {args.report_dir} in {time.perf_counter() - started:.1f}s "
+          f"({stats['rendered']} images rendered, {stats['cached']} reused from cache)")
+    if stats['failed']:
+        print(f"Failed to render {len(stats['failed'])} image(s): {', '.join(stats['failed'])}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import time
+import socket
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+def _refresh_brand(data_path, output, brand):
+    """Job body, run in a worker process: rerun the pipeline and publish a new version.
+
+    The topic settings recorded in the brand's manifest are reused, so a
+    refresh keeps the engine and topic count the brand was published with.
+    """
+    from main import run_pipeline
+    from data_processing.storage import PartitionedStore
+    run_pipeline(data_path, output, brand, **PartitionedStore(output).topic_settings(brand))
+    return brand
+
+class RefreshRunner:
+    """Recompute pipeline outputs off the request path.
+
+    Jobs run in a local process pool. A lock file per brand under
+    ``<output>/.locks`` makes sure only one refresh runs at a time even when
+    several gunicorn workers notice the same stale brand. Results are
+    published atomically by the pipeline, so readers keep serving the last
+    completed version until the new one is in place.
+    """
+
+    def __init__(self, store, max_workers=1, max_age=None, lock_timeout=3600):
+        self.store = store
+        self.max_workers = max_workers
+        # Seconds after which a brand's outputs count as stale; None disables auto-refresh
+        self.max_age = max_age
+        # A lock older than this (or whose process on this host is gone) belongs to a crashed job
+        self.lock_timeout = lock_timeout
+        self._executor = None
+        self._futures = {}
+
+    def _lock_path(self, brand):
+        return os.path.join(self.store.root, ".locks", f"brand={brand}.lock")
+
+    def _is_stale_lock(self, path):
+        """Whether a lock file was left behind by a crashed job.
+
+        Locks record '<host>:<pid>' of the process that took them. A lock is
+        stale once it is older than lock_timeout, or right away when it was
+        taken on this host by a process that no longer exists (e.g. a killed
+        gunicorn worker). Locks from other hosts only expire by age.
+        """
+        try:
+            if time.time() - os.stat(path).st_mtime > self.lock_timeout:
+                return True
+            with open(path, 'r') as f:
+                host, _, pid = f.read().partition(':')
+        except OSError:
+            return False
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _acquire(self, brand):
+        """Create the brand's lock file, clearing it first if it has gone stale."""
+        path = self._lock_path(brand)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self._is_stale_lock(path):
+            logger.warning(f"Removing stale refresh lock for {brand}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{socket.gethostname()}:{os.getpid()}")
+        return True
+
+    def _release(self, brand):
+        try:
+            os.remove(self._lock_path(brand))
+        except OSError:
+            pass
+
+    def is_running(self, brand):
+        """Whether any process is currently refreshing the brand (stale locks do not count)."""
+        path = self._lock_path(brand)
+        return os.path.exists(path) and not self._is_stale_lock(path)
+
+    def age(self, brand):
+        """Seconds since the brand's current outputs were published, or None if there are none."""
+        version = self.store.version(brand)
+        if version is None:
+            return None
+        return time.time() - version / 1e9
+
+    def is_stale(self, brand):
+        if self.max_age is None:
+            return False
+        age = self.age(brand)
+        return age is None or age > self.max_age
+
+    def submit(self, brand, data_path):
+        """Start a background refresh for the brand unless one is already running."""
+        if not data_path:
+            logger.warning(f"No data path configured for {brand}, cannot refresh")
+            return False
+        if not self._acquire(brand):
+            return False
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        logger.info(f"Starting background refresh for {brand}")
+        started = time.time()
+        try:
+            future = self._executor.submit(_refresh_brand, data_path, self.store.root, brand)
+        except Exception as e:
+            self._release(brand)
+            if isinstance(e, BrokenProcessPool):
+                # A crashed job broke the pool; start a new one on the next submit
+                self._executor = None
+            logger.error(f"Could not start background refresh for {brand}: {e}")
+            return False
+        self._futures[brand] = future
+
+        def finished(future):
+            self._release(brand)
+            self._futures.pop(brand, None)
+            if isinstance(future.exception(), BrokenProcessPool):
+                # e.g. the job was OOM-killed; the pool cannot run further jobs
+                self._executor = None
+            if future.exception() is not None:
+                logger.error(f"Background refresh for {brand} failed: {future.exception()}")
+            else:
+                logger.info(f"Background refresh for {brand} finished in {time.time() - started:.1f}s")
+
+        future.add_done_callback(finished)
+        return True
+
+    def refresh_if_stale(self, brand, data_path):
+        """Stale-while-revalidate: kick off a refresh for stale outputs without waiting for it."""
+        if self.is_stale(brand) and not self.is_running(brand):
+            return self.submit(brand, data_path)
+        return False
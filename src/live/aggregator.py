@@ -0,0 +1,206 @@
+import pandas as pd
+import re
+import math
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from analysis.trend_analyzer import POSITIVE_WORDS, NEGATIVE_WORDS
+from data_processing.feature_extractor import SocialFeatureExtractor
+
+class RollingAggregator:
+    """Incrementally maintained aggregates over a rolling window of live comments.
+
+    Each event updates one time bucket (volume, summed sentiment, hashtag and
+    keyword counters) and the window-wide counters in O(tokens) time. When
+    the newest event moves the window forward, expired buckets are subtracted
+    from the totals instead of recounting. Every change bumps a sequence
+    number, so readers can ask only for the buckets changed since their last
+    poll (see delta()).
+
+    Event time comes from the comments themselves, so replaying a file
+    produces the same aggregates as watching it live.
+    """
+
+    def __init__(self, window='1h', bucket='1min', is_keyword=None, top_n=10):
+        self.window = pd.Timedelta(window).value
+        self.bucket = pd.Timedelta(bucket).value
+        # Which words count as keywords; use KeywordAnalyzer.is_valid_keyword so live and batch counts agree
+        self.is_keyword = is_keyword or (lambda word: True)
+        self.top_n = top_n
+        self.features = SocialFeatureExtractor()
+
+        self.buckets = {}
+        self._order = []  # bucket starts, ascending
+        self._changed = {}  # bucket start -> seq of its last update
+        self.hashtags = Counter()
+        self.keywords = Counter()
+        self.total = 0
+        self.latest = None
+        self.seq = 0
+        # Events older than the window when they arrive are counted but not aggregated
+        self.late = 0
+        # Events that are not comment objects or have an unparseable timestamp
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def _to_ns(self, value):
+        """Event time in UTC nanoseconds; missing timestamps mean now.
+
+        Numbers and numeric strings (as every CSV field arrives) are epoch
+        seconds, anything else an ISO-like date string. Raises ValueError
+        for values that cannot be parsed.
+        """
+        if value is None or value == '':
+            return int(datetime.now(timezone.utc).timestamp() * 1e9)
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid timestamp {value!r}")
+        if isinstance(value, (int, float)):
+            # Epoch seconds
+            if not math.isfinite(value):
+                raise ValueError(f"Invalid timestamp {value!r}")
+            return int(value * 1e9)
+        if not isinstance(value, str):
+            raise ValueError(f"Invalid timestamp {value!r}")
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            parsed = pd.Timestamp(value)
+            if pd.isna(parsed):
+                raise ValueError(f"Invalid timestamp {value!r}")
+            parsed = parsed.to_pydatetime()
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        try:
+            return int(parsed.timestamp() * 1e6) * 1000
+        except (OverflowError, OSError):
+            raise ValueError(f"Invalid timestamp {value!r}")
+
+    def _tokenize(self, text):
+        """Hashtags and keywords of one comment (same cleaning as DataProcessor.preprocess_text)."""
+        hashtags = []
+        for match in self.features.pattern.finditer(text):
+            if match.lastgroup == 'hashtag':
+                hashtags.extend(self.features.split_hashtags(match.group('hashtag')))
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text.lower())
+        text = re.sub(r'[^\w\s]|\d+', '', text)
+        words = text.split()
+        return hashtags, words
+
+    def _new_bucket(self, start):
+        self.buckets[start] = {'count': 0, 'sentiment': 0.0, 'hashtags': Counter(), 'keywords': Counter()}
+        bisect.insort(self._order, start)
+        return self.buckets[start]
+
+    def _subtract(self, totals, counts):
+        # Touch only the expired bucket's keys; Counter '-=' would copy the whole total
+        for key, count in counts.items():
+            remaining = totals[key] - count
+            if remaining > 0:
+                totals[key] = remaining
+            else:
+                del totals[key]
+
+    def _evict(self):
+        """Drop buckets that fell out of the window and subtract them from the totals."""
+        cutoff = self.latest - self.window
+        expired = bisect.bisect_right(self._order, cutoff - self.bucket)
+        for start in self._order[:expired]:
+            bucket = self.buckets.pop(start)
+            self._changed.pop(start, None)
+            self.total -= bucket['count']
+            self._subtract(self.hashtags, bucket['hashtags'])
+            self._subtract(self.keywords, bucket['keywords'])
+        del self._order[:expired]
+
+    def _add(self, event):
+        """Aggregate one event; returns False (and counts it as rejected) if it is invalid.
+
+        The event is validated before any state changes, so a bad event
+        never leaves a partial update behind.
+        """
+        if not isinstance(event, dict):
+            self.rejected += 1
+            return False
+        try:
+            timestamp = self._to_ns(event.get('timestamp'))
+        except (TypeError, ValueError, OverflowError):
+            self.rejected += 1
+            return False
+        if self.latest is not None and timestamp < self.latest - self.window:
+            self.late += 1
+            return True
+
+        text = event.get('comment_text') or ''
+        hashtags, words = self._tokenize(text if isinstance(text, str) else str(text))
+        keywords = [word for word in words if self.is_keyword(word)]
+        positive = sum(1 for word in words if word in POSITIVE_WORDS)
+        negative = sum(1 for word in words if word in NEGATIVE_WORDS)
+
+        start = timestamp - timestamp % self.bucket
+        bucket = self.buckets.get(start) or self._new_bucket(start)
+        bucket['count'] += 1
+        bucket['sentiment'] += (positive - negative) / len(words) if words else 0.0
+        bucket['hashtags'].update(hashtags)
+        bucket['keywords'].update(keywords)
+        self.hashtags.update(hashtags)
+        self.keywords.update(keywords)
+        self.total += 1
+
+        self.seq += 1
+        self._changed[start] = self.seq
+        if self.latest is None or timestamp > self.latest:
+            self.latest = timestamp
+            if self._order[0] <= self.latest - self.window - self.bucket:
+                self._evict()
+        return True
+
+    def add(self, event):
+        """Add one comment: a dict with comment_text and an optional timestamp (ISO string or epoch seconds).
+
+        Returns whether the comment was accepted.
+        """
+        with self.lock:
+            return self._add(event)
+
+    def add_many(self, events):
+        """Add a batch of comments under one lock acquisition; returns how many were accepted.
+
+        Invalid events are skipped and counted in 'rejected'; the rest of the batch is still applied.
+        """
+        count = 0
+        with self.lock:
+            for event in events:
+                count += self._add(event)
+        return count
+
+    def delta(self, since=0):
+        """Buckets changed after sequence number since, plus the current window totals.
+
+        Clients keep the returned 'seq' and pass it back on the next poll;
+        buckets older than 'window_start' should be dropped on their side.
+        """
+        with self.lock:
+            changed = [start for start, seq in self._changed.items() if seq > since]
+            return {
+                'seq': self.seq,
+                'window_start': pd.Timestamp(self.latest - self.window, tz='UTC').isoformat() if self.latest else None,
+                'buckets': [
+                    {
+                        'time': pd.Timestamp(start, tz='UTC').isoformat(),
+                        'count': self.buckets[start]['count'],
+                        'sentiment': self.buckets[start]['sentiment'] / self.buckets[start]['count']
+                    }
+                    for start in sorted(changed)
+                ],
+                'total': self.total,
+                'late': self.late,
+                'rejected': self.rejected,
+                'hashtags': self.hashtags.most_common(self.top_n),
+                'keywords': self.keywords.most_common(self.top_n)
+            }
@@ -0,0 +1,136 @@
+import io
+import os
+import csv
+import json
+import numpy as np
+import logging
+import threading
+from flask import request, jsonify
+
+logger = logging.getLogger(__name__)
+
+class FileTailer(threading.Thread):
+    """Follow an append-only comments file and feed new rows to a RollingAggregator.
+
+    JSONL files (.jsonl, .ndjson, .json) hold one comment object per line;
+    anything else is read as CSV with a header row and one comment per line.
+    Only complete records are parsed, so a writer flushing half a row is picked
+    up on the next poll; CSV records may span lines inside quoted fields. If
+    the file shrinks (rotated or truncated) it is read again from the start.
+    """
+
+    JSON_EXTENSIONS = ('.jsonl', '.ndjson', '.json')
+
+    def __init__(self, path, aggregator, poll_interval=0.5, chunk_size=1 << 20):
+        super().__init__(daemon=True, name=f"tail:{os.path.basename(path)}")
+        self.path = path
+        self.aggregator = aggregator
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.is_json = path.lower().endswith(self.JSON_EXTENSIONS)
+        self.offset = 0
+        self.header = None
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _record_end(self, chunk):
+        """Length of the complete records at the start of chunk (0 if there are none).
+
+        A newline ends a JSONL record. In CSV it only ends one outside quoted
+        fields, i.e. after an even number of quote characters (an escaped
+        quote is two); chunks always start at a record boundary.
+        """
+        if self.is_json:
+            return chunk.rfind(b'\n') + 1
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        newlines = np.flatnonzero(data == ord('\n'))
+        quotes_before = np.cumsum(data == ord('"'))[newlines] if len(newlines) else newlines
+        boundaries = newlines[quotes_before % 2 == 0]
+        return int(boundaries[-1]) + 1 if len(boundaries) else 0
+
+    def _parse(self, text):
+        if self.is_json:
+            events = []
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping malformed line in {self.path}")
+            return events
+
+        rows = list(csv.reader(io.StringIO(text, newline='')))
+        if self.header is None and rows:
+            self.header = rows.pop(0)
+        return [dict(zip(self.header, row)) for row in rows if row]
+
+    def poll(self):
+        """Read and aggregate everything appended since the last poll; returns the number of events read."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            logger.info(f"{self.path} was truncated, reading from the start")
+            self.offset, self.header = 0, None
+        if size == self.offset:
+            return 0
+
+        added = 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            read_size = self.chunk_size
+            while True:
+                chunk = f.read(read_size)
+                # Stop after the last complete record; a partial one is read again next time
+                end = self._record_end(chunk)
+                if end == 0:
+                    if len(chunk) < read_size:
+                        break
+                    # A single record longer than the chunk: read more of it
+                    read_size *= 2
+                    f.seek(self.offset)
+                    continue
+                self.offset += end
+                events = self._parse(chunk[:end].decode('utf-8', errors='replace'))
+                accepted = self.aggregator.add_many(events)
+                if accepted < len(events):
+                    logger.warning(f"Rejected {len(events) - accepted} invalid comments in {self.path}")
+                added += len(events)
+                if len(chunk) < read_size:
+                    break
+                read_size = self.chunk_size
+                f.seek(self.offset)
+        return added
+
+    def run(self):
+        logger.info(f"Tailing {self.path} for live comments")
+        while not self._stopped.is_set():
+            try:
+                added = self.poll()
+            except Exception as e:
+                logger.error(f"Error tailing {self.path}: {e}")
+                added = 0
+            if not added:
+                self._stopped.wait(self.poll_interval)
+
+def install_ingest_endpoint(server, aggregator, route='/api/live/comments'):
+    """Accept POSTed comments (one JSON object or a list of them) into the aggregator.
+
+    Each comment is validated on its own; the response reports how many were
+    accepted and rejected.
+    """
+
+    def ingest():
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = [payload]
+        if not isinstance(payload, list):
+            return jsonify({'error': 'Expected a JSON comment object or a list of them'}), 400
+        accepted = aggregator.add_many(payload)
+        return jsonify({'accepted': accepted, 'rejected': len(payload) - accepted, 'seq': aggregator.seq})
+
+    server.add_url_rule(route, 'live_ingest', ingest, methods=['POST'])
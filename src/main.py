@@ -1,9 +1,243 @@
 import argparse
-from data_processing.processor import DataProcessor
-from analysis.trend_analyzer import TrendAnalyzer
-from analysis.keyword_analyzer import KeywordAnalyzer
 import os
-import json
+import time
+from data_processing.brands import load_brand_config
+from data_processing.storage import PartitionedStore
+from data_processing.dtypes import optimize_dtypes, memory_report
+from analysis.trend_analyzer import TOPIC_ENGINES
+
+# Pipeline stages in run order. Heavy dependencies (spaCy, NLTK, scikit-learn)
+# are imported inside the stages that need them, so a quick rerun of e.g. the
+# aggregates starts without loading any models.
+STAGES = ['process', 'topics', 'keywords', 'aggregates', 'posts']
+
+# Stages built from another stage's output. Rerunning a stage reruns everything
+# downstream of it, so a partial run never publishes artifacts computed from
+# the previous comments or topics.
+STAGE_DEPENDENTS = {
+    'process': ['topics'],
+    'topics': ['keywords', 'aggregates', 'posts'],
+    'keywords': ['aggregates']
+}
+
+def resolve_stages(stages):
+    """The requested stages plus every stage downstream of them, in run order."""
+    selected = set(stages)
+    pending = list(stages)
+    while pending:
+        for dependent in STAGE_DEPENDENTS.get(pending.pop(), []):
+            if dependent not in selected:
+                selected.add(dependent)
+                pending.append(dependent)
+    return [stage for stage in STAGES if stage in selected]
+
+def process_stage(data_path, brand_config, staging, brand):
+    """Load, clean and deduplicate the raw comments."""
+    from data_processing.processor import DataProcessor
+    from data_processing.deduplicator import CommentDeduplicator
+
+    data_processor = DataProcessor(brand_config['stop_words'])
+    deduplicator = CommentDeduplicator()
+
+    print(f"Attempting to load data from: {data_path}")
+    df = data_processor.load_data(data_path)
+    print(f"Data loaded successfully. Shape: {df.shape}")
+
+    print("\nProcessing data...")
+    processed_df = data_processor.process_data(df)
+    print("Data processing completed")
+
+    # Collapse near-duplicate and spam comments so NLP runs once per cluster
+    print("\nDeduplicating comments...")
+    processed_df = deduplicator.deduplicate(processed_df)
+    spam_report = deduplicator.spam_report(processed_df)
+    print(f"Deduplication completed: {spam_report['unique_clusters']} clusters, "
+          f"{spam_report['spam_comments']} spam comments")
+
+    staging.write_json(brand, "spam_report.json", spam_report)
+    print("Spam report saved")
+    return processed_df
+
+def topics_stage(processed_df, staging, brand, n_topics=5, topic_engine='lda', topic_candidates=None,
+                 compare_engines=False):
+    """Fit the topic model and assign a topic to every comment."""
+    from analysis.trend_analyzer import TrendAnalyzer
+
+    trend_analyzer = TrendAnalyzer(n_topics=n_topics, engine=topic_engine)
+
+    # Select the number of topics
+    if topic_candidates:
+        engines = TOPIC_ENGINES if compare_engines else [topic_engine]
+        print(f"Selecting topic model from {topic_candidates} topics ({', '.join(engines)})...")
+        topic_selection = trend_analyzer.select_topic_model(
+            processed_df, topic_candidates, engines, weight_column='cluster_size'
+        )
+        print(topic_selection.to_string(index=False))
+        best = topic_selection.iloc[0]
+        trend_analyzer.configure_topic_model(best['engine'], int(best['n_topics']))
+        print(f"Selected {best['engine']} with {best['n_topics']} topics")
+
+        scores = topic_selection.astype(object).where(topic_selection.notna(), None)
+        staging.write_json(brand, "topic_model_selection.json", scores.to_dict(orient='records'))
+
+    topics, processed_df = trend_analyzer.perform_topic_modeling(processed_df, weight_column='cluster_size')
+    print("Topic modeling completed")
+
+    staging.write_json(brand, "topics.json", topics)
+    print("Topic information saved")
+    return processed_df
+
+def keywords_stage(processed_df, brand_config, staging, brand):
+    """Mine phrases and analyze the top keywords."""
+    from analysis.phrase_miner import PhraseMiner
+    from analysis.keyword_analyzer import KeywordAnalyzer
+
+    phrase_miner = PhraseMiner(max_phrases=200)
+    keyword_analyzer = KeywordAnalyzer(brand_config['stop_words'] + brand_config['keyword_stop_words'])
+
+    # Mine collocations over the whole corpus
+    print("Mining phrases...")
+    phrases, phrases_by_window = phrase_miner.mine(
+        processed_df[processed_df['is_representative']], weight_column='cluster_size', time_window='1D'
+    )
+    print(f"Phrase mining completed: {len(phrases)} phrases")
+    staging.write_json(brand, "phrases.json", {
+        'overall': phrases.to_dict(orient='records'),
+        'by_window': phrases_by_window
+    })
+    print("Phrases saved")
+
+    print("\nPerforming keyword analysis...")
+    keyword_analysis = keyword_analyzer.analyze_keywords_in_corpus(
+        processed_df, weight_column='cluster_size', phrases=phrases
+    )
+    print("Keyword analysis completed")
+    keyword_analysis.to_csv(staging.artifact_path(brand, "keyword_analysis.csv"), index=False)
+    print("Keyword analysis saved")
+    return processed_df
+
+def aggregates_stage(processed_df, staging, brand):
+    """Build the hashtag co-occurrence network and the summaries served by the API."""
+    import pandas as pd
+    from analysis.network_analyzer import HashtagNetworkAnalyzer
+    from analysis.aggregate_analyzer import AggregateAnalyzer
+
+    network_analyzer = HashtagNetworkAnalyzer()
+    hashtag_network = network_analyzer.analyze(processed_df)
+    print(f"Hashtag network built: {len(hashtag_network['labels'])} nodes, {len(hashtag_network['value'])} edges")
+    network_analyzer.save(hashtag_network, staging.artifact_path(brand, "hashtag_network.json"))
+    print("Hashtag network saved")
+
+    # Keyword trends cover the keywords picked by the keywords stage (this run or carried over)
+    keyword_path = staging.artifact_path(brand, "keyword_analysis.csv")
+    keywords = pd.read_csv(keyword_path, usecols=['keyword'])['keyword'].tolist() if os.path.exists(keyword_path) else []
+    staging.write_json(brand, "aggregates.json", AggregateAnalyzer().analyze(processed_df, keywords))
+    print("Aggregates saved")
+    return processed_df
+
+def posts_stage(processed_df, staging, brand):
+    """Per-post engagement table and caption hashtag / comment topic association."""
+    from analysis.post_analyzer import PostEngagementAnalyzer
+
+    posts, hashtag_topics = PostEngagementAnalyzer().analyze(processed_df)
+    print(f"Post analytics computed for {len(posts)} posts")
+    staging.write_table(brand, "posts.parquet", posts)
+    staging.write_json(brand, "hashtag_topics.json", hashtag_topics.to_dict(orient='records'))
+    print("Post analytics saved")
+    return processed_df
+
+def run_pipeline(data_path, output, brand, n_topics=5, topic_engine='lda', topic_candidates=None,
+                 compare_engines=False, stages=None, report_memory=False):
+    """Run the analysis for one brand and publish the results atomically.
+
+    stages selects a subset of STAGES (default: all); the stages downstream of
+    them (see STAGE_DEPENDENTS) are added. Stages that are not run keep their
+    artifacts from the brand's current outputs, and without the process stage
+    the processed comments are read back from the store.
+
+    With topic_candidates, candidate topic counts are fit in parallel first
+    and the most coherent configuration is used for the final topic model;
+    compare_engines scores every engine in TOPIC_ENGINES, not just topic_engine.
+
+    The processed frame is cast to compact dtypes (see DTYPE_PLAN) before the
+    analysis stages; report_memory prints its per-column memory before and after.
+    """
+    requested = [stage for stage in STAGES if stage in (stages or STAGES)]
+    stages = resolve_stages(requested)
+    if stages != requested:
+        added = [stage for stage in stages if stage not in requested]
+        print(f"Also running dependent stages: {', '.join(added)}")
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output, exist_ok=True)
+    print(f"Output directory created/verified: {output}")
+    store = PartitionedStore(output)
+    brand_config = load_brand_config(brand)
+
+    if 'process' not in stages and store.version(brand) is None:
+        raise ValueError(f"No existing outputs for brand '{brand}'; run the process stage first")
+
+    # Write into a staged version; the dashboard keeps serving the previous one until publish
+    staging = store.stage(brand)
+    try:
+        # Seed the stages that are not run from the current outputs, if the brand has any yet
+        if stages != STAGES and store.version(brand) is not None:
+            staging.carry_over(brand, store)
+
+        if 'process' in stages:
+            print("\nLoading and processing data...")
+            processed_df = process_stage(data_path, brand_config, staging, brand)
+        else:
+            print("\nLoading processed comments...")
+            processed_df = store.read_comments(brand)
+            print(f"Processed comments loaded. Shape: {processed_df.shape}")
+
+        # Shallow copy: optimize_dtypes replaces columns, so this keeps the original ones for the report
+        before = processed_df.copy(deep=False) if report_memory else None
+        processed_df = optimize_dtypes(processed_df)
+        if report_memory:
+            print(f"\nMemory report ({len(processed_df)} rows):")
+            print(memory_report(before, processed_df).to_string())
+            del before
+
+        stage_functions = {
+            'topics': lambda df: topics_stage(df, staging, brand, n_topics, topic_engine, topic_candidates,
+                                              compare_engines),
+            'keywords': lambda df: keywords_stage(df, brand_config, staging, brand),
+            'aggregates': lambda df: aggregates_stage(df, staging, brand),
+            'posts': lambda df: posts_stage(df, staging, brand)
+        }
+        for stage in stages:
+            if stage in stage_functions:
+                print(f"\nRunning {stage} stage...")
+                started = time.perf_counter()
+                processed_df = stage_functions[stage](processed_df)
+                print(f"{stage} stage finished in {time.perf_counter() - started:.1f}s")
+
+        # Comments only change when they are (re)processed or get new topic assignments
+        if 'process' in stages or 'topics' in stages:
+            print("\nSaving processed data...")
+            dates = staging.write_comments(brand, optimize_dtypes(processed_df))
+            print(f"Processed data saved to {staging.comments_dir(brand)} ({len(dates)} date partitions)")
+        else:
+            dates = store.read_json(brand, "manifest.json")['dates']
+
+        # Refreshes reuse the topic settings of the run that built the current topics
+        if 'topics' in stages:
+            topic_settings = {'n_topics': n_topics, 'topic_engine': topic_engine,
+                              'topic_candidates': topic_candidates, 'compare_engines': compare_engines}
+        else:
+            topic_settings = store.topic_settings(brand)
+
+        # Manifest goes last so the dashboard only picks up complete runs
+        staging.write_manifest(brand, dates, len(processed_df), topic_settings)
+    except BaseException:
+        # A failed run leaves no staged copy behind; the published version is untouched
+        store.discard(staging)
+        raise
+    store.publish(brand, staging)
+
+    print(f"\nAnalysis complete ({', '.join(stages)}). Results saved to {store.brand_dir(brand)}")
 
 def main():
     print("\n" + "="*50)
@@ -13,69 +247,43 @@ def main():
     # Get data path from environment variable or command line argument
     data_path = os.getenv('DATA_PATH')
     output_path = os.getenv('OUTPUT_PATH', 'output')
+    brand = os.getenv('BRAND', 'treehut')
     
-    parser = argparse.ArgumentParser(description="Treehut Social Media Trend Analysis")
+    parser = argparse.ArgumentParser(description="Social Media Trend Analysis")
     parser.add_argument("--data", type=str, help="Path to the input data file")
     parser.add_argument("--output", type=str, default=output_path, help="Output directory for results")
+    parser.add_argument("--brand", type=str, default=brand, help="Brand (dataset) the data belongs to")
+    parser.add_argument("--topics", type=int, default=5, help="Number of topics")
+    parser.add_argument("--topic-engine", type=str, default='lda', choices=TOPIC_ENGINES,
+                        help="Topic modeling engine")
+    parser.add_argument("--select-topics", type=str,
+                        help="Comma-separated candidate topic counts to fit in parallel and score, e.g. 3,5,8,10")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="With --select-topics, score every topic engine instead of only --topic-engine")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Print per-column memory of the processed comments before and after dtype optimization")
+    parser.add_argument("--stages", type=str, default=','.join(STAGES),
+                        help=f"Comma-separated stages to run ({', '.join(STAGES)}); "
+                             "stages that depend on them are rerun too, the others keep their existing outputs")
     args = parser.parse_args()
 
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}. Choose from {', '.join(STAGES)}")
+
     # Use command line argument if provided, otherwise use environment variable
     data_path = args.data if args.data else data_path
 
-    if not data_path:
+    if not data_path and 'process' in stages:
         print("Error: No data file specified. Please provide --data argument or set DATA_PATH environment variable.")
         return
 
-    print(f"Arguments parsed: data={data_path}, output={args.output}")
-
-    # Create output directory if it doesn't exist
-    os.makedirs(args.output, exist_ok=True)
-    print(f"Output directory created/verified: {args.output}")
-
-    # Initialize processors
-    print("Initializing processors...")
-    data_processor = DataProcessor()
-    trend_analyzer = TrendAnalyzer()
-    keyword_analyzer = KeywordAnalyzer()
-    print("Processors initialized successfully")
-
-    # Load and process data
-    print("\nLoading and processing data...")
-    print(f"Attempting to load data from: {data_path}")
-    df = data_processor.load_data(data_path)
-    print(f"Data loaded successfully. Shape: {df.shape}")
-    
-    print("\nProcessing data...")
-    processed_df = data_processor.process_data(df)
-    print("Data processing completed")
-
-    # Perform topic modeling
-    print("\nPerforming topic modeling...")
-    topics, processed_df = trend_analyzer.perform_topic_modeling(processed_df)
-    print("Topic modeling completed")
-
-    # Perform keyword analysis
-    print("\nPerforming keyword analysis...")
-    keyword_analysis = keyword_analyzer.analyze_keywords_in_corpus(processed_df)
-    print("Keyword analysis completed")
-
-    # Save processed data
-    print("\nSaving processed data...")
-    processed_df.to_csv(os.path.join(args.output, "processed_data.csv"), index=False)
-    print("Processed data saved")
-
-    # Save topic information
-    print("\nSaving topic information...")
-    with open(os.path.join(args.output, "topics.json"), "w") as f:
-        json.dump(topics, f, indent=2)
-    print("Topic information saved")
-
-    # Save keyword analysis
-    print("\nSaving keyword analysis...")
-    keyword_analysis.to_csv(os.path.join(args.output, "keyword_analysis.csv"), index=False)
-    print("Keyword analysis saved")
+    print(f"Arguments parsed: data={data_path}, output={args.output}, brand={args.brand}")
 
-    print(f"\nAnalysis complete. Results saved to {args.output}")
+    topic_candidates = [int(n) for n in args.select_topics.split(',')] if args.select_topics else None
+    run_pipeline(data_path, args.output, args.brand, args.topics, args.topic_engine, topic_candidates,
+                 args.compare_engines, stages, args.memory_report)
     print("To view the visualization dashboard, run: docker-compose up")
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import ast
+import csv
+import json
+import zlib
+import threading
+from collections import OrderedDict
+from flask import request, Response
+
+class AnalyticsAPI:
+    """Read-only JSON endpoints over the precomputed pipeline artifacts.
+
+    Every response is built from the JSON/CSV artifacts of the brand's
+    published version (no pandas on the request path), serialized once and
+    cached per version. ETags are derived from the version, so clients that
+    send If-None-Match get a 304 until the next pipeline run is published.
+    Compression is left to install_gzip().
+    """
+
+    def __init__(self, store, maxsize=256):
+        self.store = store
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _json(self, brand, name):
+        path = self.store.artifact_path(brand, name)
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise LookupError(f"{name} has not been computed for {brand}; rerun the pipeline")
+
+    def _keyword_rows(self, brand):
+        """keyword_analysis.csv rows with their list columns parsed."""
+        path = self.store.artifact_path(brand, 'keyword_analysis.csv')
+        try:
+            with open(path, 'r', newline='') as f:
+                rows = list(csv.DictReader(f))
+        except FileNotFoundError:
+            raise LookupError(f"keyword_analysis.csv has not been computed for {brand}; rerun the pipeline")
+        for row in rows:
+            row['frequency'] = int(float(row['frequency']))
+            for column in ('synonyms', 'related_terms', 'key_phrases'):
+                row[column] = ast.literal_eval(row[column]) if row.get(column) else []
+        return rows
+
+    def _window(self, summaries):
+        window = request.args.get('window', '1D')
+        if window not in summaries:
+            raise ValueError(f"Unknown window '{window}'. Choose from {', '.join(summaries)}")
+        return window
+
+    # Endpoint bodies; each returns a JSON-serializable object
+
+    def volume(self, brand):
+        volume = self._json(brand, 'aggregates.json')['volume']
+        window = self._window(volume)
+        return {'brand': brand, 'window': window, 'series': volume[window]}
+
+    def keywords(self, brand):
+        keywords = self._json(brand, 'aggregates.json')['keywords']
+        window = self._window(keywords)
+        return {'brand': brand, 'window': window, 'windows': keywords[window]}
+
+    def keyword_detail(self, brand, keyword):
+        for row in self._keyword_rows(brand):
+            if row['keyword'] == keyword.lower():
+                return row
+        raise LookupError(f"'{keyword}' is not an analyzed keyword for {brand}")
+
+    def hashtag_graph(self, brand):
+        return self._json(brand, 'hashtag_network.json')
+
+    def topics(self, brand):
+        counts = {item['topic_id']: item['count'] for item in self._json(brand, 'aggregates.json')['topics']}
+        return [dict(topic, count=counts.get(topic['topic_id'], 0)) for topic in self._json(brand, 'topics.json')]
+
+    def _respond(self, brand, endpoint, build, *args):
+        version = self.store.version(brand)
+        if version is None:
+            return self._error(404, f"Unknown brand '{brand}'")
+
+        key = (brand, version, endpoint, args, tuple(sorted(request.args.items())))
+        etag = f"{brand}-{version}-{zlib.crc32(repr(key[2:]).encode('utf-8')):08x}"
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+
+        if body is None:
+            try:
+                body = json.dumps(build(brand, *args), default=str).encode('utf-8')
+            except LookupError as e:
+                return self._error(404, str(e))
+            except ValueError as e:
+                return self._error(400, str(e))
+            if self.store.version(brand) != version:
+                # A refresh was published during the build; the body may be from the new
+                # version, so neither cache it nor tag it with the old one
+                response = Response(body, mimetype='application/json')
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            with self._lock:
+                self._cache[key] = body
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+
+        response = Response(body, mimetype='application/json')
+        # Weak: gzip changes the bytes but not the content
+        response.set_etag(etag, weak=True)
+        # Clients may cache but must revalidate, which costs a 304 while the version is unchanged
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def _error(self, status, message):
+        return Response(json.dumps({'error': message}), status=status, mimetype='application/json')
+
+    def brands(self):
+        body = [{'brand': brand, 'version': self.store.version(brand)} for brand in self.store.list_brands()]
+        return Response(json.dumps(body), mimetype='application/json')
+
+    def install(self, server, prefix='/api'):
+        """Register the endpoints on the Flask server."""
+        routes = [
+            ('/brands/<brand>/volume', 'volume', self.volume),
+            ('/brands/<brand>/keywords', 'keywords', self.keywords),
+            ('/brands/<brand>/keywords/<keyword>', 'keyword_detail', self.keyword_detail),
+            ('/brands/<brand>/hashtags/graph', 'hashtag_graph', self.hashtag_graph),
+            ('/brands/<brand>/topics', 'topics', self.topics)
+        ]
+        server.add_url_rule(f"{prefix}/brands", 'api_brands', self.brands)
+        for rule, endpoint, build in routes:
+            server.add_url_rule(
+                prefix + rule, f"api_{endpoint}",
+                lambda endpoint=endpoint, build=build, **kwargs: self._respond(
+                    kwargs.pop('brand'), endpoint, build, *kwargs.values()
+                )
+            )
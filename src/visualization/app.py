@@ -1,15 +1,34 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-import json
 from datetime import datetime
 from collections import Counter
 import logging
+import os
 import sys
 import re
+from collections import OrderedDict
+
+# Make the src packages importable whether run as a script or via gunicorn
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.network_analyzer import HashtagNetworkAnalyzer
+from data_processing.comment_index import CommentIndex
+from data_processing.storage import PartitionedStore
+from data_processing.brands import load_brand_config
+from data_processing.dtypes import optimize_dtypes
+from jobs.runner import RefreshRunner
+from visualization.figures import (FigureCache, empty_figure, hashtag_sankey_figure,
+                                   hashtag_force_figure, related_terms_figure, live_volume_figure,
+                                   ranked_bar_figure)
+from visualization.payload import histogram_bins, downsample_series, install_gzip
+from visualization.api import AnalyticsAPI
+from live.aggregator import RollingAggregator
+from live.sources import FileTailer, install_ingest_endpoint
 
 # Configure logging
 logging.basicConfig(
@@ -25,10 +44,194 @@ logger = logging.getLogger(__name__)
 
 app = dash.Dash(__name__)
 server = app.server  # Expose server variable for deployment
+install_gzip(server)
+
+# Serialized network figures, keyed by artifact version and parameters
+figure_cache = FigureCache()
+
+# Partitioned pipeline outputs; each brand is read from its own directory
+store = PartitionedStore(os.getenv('OUTPUT_PATH', 'output'))
+DEFAULT_BRAND = os.getenv('BRAND', 'treehut')
+
+# Read-only JSON endpoints under /api for reporting tools
+AnalyticsAPI(store).install(server)
+
+# Background recomputation; outputs older than REFRESH_MAX_AGE seconds are refreshed
+# while the last completed version keeps being served
+refresh_runner = RefreshRunner(
+    store,
+    max_age=float(os.getenv('REFRESH_MAX_AGE')) if os.getenv('REFRESH_MAX_AGE') else None
+)
+
+def create_live_aggregator():
+    """Live mode: tail LIVE_SOURCE and/or accept POSTs when LIVE_INGEST is set.
+
+    Aggregates live in this process, so run live mode with a single worker.
+    """
+    source = os.getenv('LIVE_SOURCE')
+    ingest = os.getenv('LIVE_INGEST', '').lower() in ('1', 'true', 'yes')
+    if not source and not ingest:
+        return None
+
+    from analysis.keyword_analyzer import KeywordAnalyzer
+    brand_config = load_brand_config(os.getenv('LIVE_BRAND', DEFAULT_BRAND))
+    # Same keyword rule and stop words as the keywords stage
+    keyword_analyzer = KeywordAnalyzer(brand_config['stop_words'] + brand_config['keyword_stop_words'])
+    aggregator = RollingAggregator(
+        window=os.getenv('LIVE_WINDOW', '1h'),
+        bucket=os.getenv('LIVE_BUCKET', '1min'),
+        is_keyword=keyword_analyzer.is_valid_keyword
+    )
+    if source:
+        FileTailer(source, aggregator).start()
+    if ingest:
+        install_ingest_endpoint(server, aggregator)
+        logger.info("Accepting live comments on /api/live/comments")
+    return aggregator
+
+live_aggregator = create_live_aggregator()
+
+def brand_data_path(brand):
+    """Raw data used to refresh a brand: brand config first, then DATA_PATH for the default brand."""
+    data_path = load_brand_config(brand)['data_path']
+    if not data_path and brand == DEFAULT_BRAND:
+        data_path = os.getenv('DATA_PATH')
+    return data_path
+
+# Time-sorted comment indexes for recently viewed brands and date ranges, rebuilt only when a brand's outputs change
+MAX_CACHED_INDEXES = 4
+_comment_indexes = OrderedDict()
+
+def load_comment_index(brand, start_date=None, end_date=None):
+    """Load a brand's processed comments into a CommentIndex, reusing it while its outputs are unchanged.
+
+    Only the date partitions within [start_date, end_date] are read; an
+    index over the whole brand that is already in memory covers any range.
+    """
+    version = store.version(brand)
+    key = (brand, start_date, end_date)
+    for candidate in (key, (brand, None, None)):
+        cached = _comment_indexes.get(candidate)
+        if cached is not None and cached[0] == version:
+            _comment_indexes.move_to_end(candidate)
+            return cached[1]
+
+    logger.info(f"Loading processed data for {brand} ({start_date or 'start'} to {end_date or 'end'})")
+    df = optimize_dtypes(store.read_comments(brand, start_date, end_date))
+
+    logger.info("Building comment index")
+    index = CommentIndex(df)
+    _comment_indexes[key] = (version, index)
+    _comment_indexes.move_to_end(key)
+    while len(_comment_indexes) > MAX_CACHED_INDEXES:
+        _comment_indexes.popitem(last=False)
+    return index
+
+def select_comments(brand, start_date=None, end_date=None, media_id=None):
+    """Comments of a brand within the selected dates (end date inclusive), optionally one post only."""
+    comment_index = load_comment_index(brand, start_date, end_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1) if end_date else None
+    df = comment_index.slice(start_date, end, media_id)
+    logger.info(f"Selected {len(df)} of {len(comment_index)} comments")
+    return df
+
+# Post selector options: the busiest posts, or the posts matching the typed search
+MAX_MEDIA_OPTIONS = 200
+_media_counts = OrderedDict()
+
+def load_media_counts(brand):
+    """Comments per post for a brand, busiest first; reads only media_id, once per version."""
+    version = store.version(brand)
+    cached = _media_counts.get(brand)
+    if cached is not None and cached[0] == version:
+        _media_counts.move_to_end(brand)
+        return cached[1]
+
+    counts = store.read_comments(brand, columns=['media_id'])['media_id'].astype(str).value_counts()
+    _media_counts[brand] = (version, counts)
+    while len(_media_counts) > MAX_CACHED_INDEXES:
+        _media_counts.popitem(last=False)
+    return counts
+
+def load_hashtag_graph(brand):
+    """Load the precomputed hashtag graph, falling back to building it from processed data."""
+    path = store.artifact_path(brand, 'hashtag_network.json')
+    if os.path.exists(path):
+        return HashtagNetworkAnalyzer.load(path)
+    logger.info("Precomputed hashtag network not found, building from processed data")
+    df = store.read_comments(brand, columns=['hashtags'])
+    return HashtagNetworkAnalyzer().build_graph(df)
+
+def load_filtered_hashtag_graph(brand, start_date, end_date, media_id):
+    """Hashtag graph of the selected comments, with nodes at their whole-corpus layout positions.
+
+    Keeping the corpus positions makes the force view stable while the
+    filters change; a layout is only computed if the corpus graph has none.
+    """
+    analyzer = HashtagNetworkAnalyzer()
+    graph = analyzer.build_graph(select_comments(brand, start_date, end_date, media_id))
+    corpus = load_hashtag_graph(brand)
+    positions = dict(zip(corpus['labels'], zip(corpus.get('x', []), corpus.get('y', []))))
+    if all(label in positions for label in graph['labels']):
+        graph['x'] = [positions[label][0] for label in graph['labels']]
+        graph['y'] = [positions[label][1] for label in graph['labels']]
+    else:
+        layout = analyzer.compute_layout(graph)
+        graph['x'] = layout[:, 0].round(4).tolist()
+        graph['y'] = layout[:, 1].round(4).tolist()
+    return graph
+
+def create_live_section():
+    """Rolling live charts, updated from aggregator deltas on every interval tick."""
+    if live_aggregator is None:
+        return html.Div()
+    return html.Div([
+        html.H2("Live"),
+        html.Span(id='live-status', style={'color': 'gray'}),
+        dcc.Interval(id='live-interval', interval=2 * 1000),
+        dcc.Store(id='live-state'),
+        dcc.Graph(id='live-volume-graph'),
+        html.Div([
+            dcc.Graph(id='live-hashtag-graph', style={'width': '50%', 'display': 'inline-block'}),
+            dcc.Graph(id='live-keyword-graph', style={'width': '50%', 'display': 'inline-block'})
+        ])
+    ])
 
 def create_layout():
+    brands = store.list_brands()
     return html.Div([
-        html.H1("Treehut Social Media Trend Analysis"),
+        html.H1("Social Media Trend Analysis"),
+
+        create_live_section(),
+        
+        
+        # Dataset, date range and post filters
+        html.Div([
+            html.Label("Dataset:"),
+            dcc.Dropdown(
+                id='brand-selector',
+                options=[{'label': brand, 'value': brand} for brand in brands],
+                value=DEFAULT_BRAND if DEFAULT_BRAND in brands or not brands else brands[0],
+                clearable=False
+            ),
+            html.Button("Refresh data", id='refresh-button', n_clicks=0),
+            html.Span(id='refresh-status', style={'marginLeft': '10px', 'color': 'gray'}),
+            dcc.Interval(id='refresh-interval', interval=15 * 1000),
+            dcc.Store(id='data-version'),
+            dcc.Store(id='selection-brand'),
+            html.Label("Date Range:"),
+            dcc.DatePickerRange(
+                id='date-range-selector',
+                clearable=True
+            ),
+            html.Label("Post:"),
+            dcc.Dropdown(
+                id='media-selector',
+                options=[],  # Busiest posts, narrowed server-side as the user types
+                value=None,
+                placeholder="All posts (type to search)"
+            )
+        ]),
         
         # Daily keyword trends (moved to top)
         html.Div([
@@ -77,6 +280,15 @@ def create_layout():
                 # Hashtag co-occurrence network
                 html.Div([
                     html.H4("Hashtag Co-occurrence Network"),
+                    dcc.RadioItems(
+                        id='hashtag-network-view',
+                        options=[
+                            {'label': 'Top pairs (Sankey)', 'value': 'sankey'},
+                            {'label': 'Full network', 'value': 'force'}
+                        ],
+                        value='sankey',
+                        inline=True
+                    ),
                     dcc.Graph(id='hashtag-network-graph')
                 ])
             ])
@@ -88,6 +300,12 @@ def create_layout():
             dcc.Graph(id='comment-volume-graph')
         ]),
         
+        # Mentions, emoji, hashtags and links per comment over time
+        html.Div([
+            html.H2("Engagement Signals Over Time"),
+            dcc.Graph(id='engagement-signal-graph')
+        ]),
+        
         # Comment length distribution
         html.Div([
             html.H2("Comment Length Distribution"),
@@ -133,67 +351,98 @@ def create_layout():
         ])
     ])
 
-app.layout = create_layout()
+# Evaluated per page load so newly written brands show up in the selector
+app.layout = create_layout
+
+def version_brand(data_version):
+    """Brand of the data version set by update_refresh_status.
+
+    The brand-driven callbacks take data-version as their only brand input, so
+    a page load or brand switch recomputes them once, after the version is known.
+    """
+    if not data_version:
+        raise PreventUpdate
+    return data_version['brand']
 
 @app.callback(
     [Output('comment-volume-graph', 'figure'),
+     Output('engagement-signal-graph', 'figure'),
      Output('comment-length-graph', 'figure'),
      Output('topic-graph', 'figure'),
      Output('topic-details', 'children'),
      Output('day-graph', 'figure'),
      Output('hour-graph', 'figure'),
      Output('hashtag-frequency-graph', 'figure'),
-     Output('hashtag-network-graph', 'figure'),
      Output('keyword-frequency-graph', 'figure'),
      Output('daily-keyword-graph', 'figure'),
      Output('keyword-selector', 'options'),
      Output('keyword-details', 'children'),
      Output('related-terms-graph', 'figure')],
     [Input('time-window-selector', 'value'),
-     Input('keyword-selector', 'value')]
+     Input('keyword-selector', 'value'),
+     Input('date-range-selector', 'start_date'),
+     Input('date-range-selector', 'end_date'),
+     Input('media-selector', 'value'),
+     Input('data-version', 'data')]
 )
-def update_graphs(time_window, selected_keyword):
+def update_graphs(time_window, selected_keyword, start_date=None, end_date=None, media_id=None,
+                  data_version=None):
+    brand = version_brand(data_version)
     try:
         logger.info("Starting graph update")
         
-        # Load processed data
-        logger.info("Loading processed data")
-        df = pd.read_csv('output/processed_data.csv')
+        # Slice processed data to the selected date range and post
+        df = select_comments(brand, start_date, end_date, media_id)
+        if df.empty:
+            return graph_outputs_message("No comments in the selected date range and post")
         
         # Load keyword analysis data
         logger.info("Loading keyword analysis data")
-        keyword_df = pd.read_csv('output/keyword_analysis.csv')
-        
-        # Parse timestamps
-        logger.info("Parsing timestamps")
-        try:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
-        except ValueError:
-            try:
-                df['timestamp'] = pd.to_datetime(df['timestamp'], dayfirst=True)
-            except ValueError:
-                try:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
-                except ValueError:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], format='%Y-%m-%d %H:%M:%S.%f%z')
+        keyword_df = pd.read_csv(store.artifact_path(brand, 'keyword_analysis.csv'))
         
         # Comment volume over time
         logger.info("Creating comment volume graph")
+        volume_df = df.groupby(pd.Grouper(key='timestamp', freq=time_window)).size().reset_index()
         volume_fig = px.line(
-            df.groupby(pd.Grouper(key='timestamp', freq=time_window)).size().reset_index(),
+            downsample_series(volume_df, 'timestamp', 0),
             x='timestamp',
             y=0,
             title='Comment Volume Over Time'
         )
         
+        # Engagement signals (per-comment rates from the extracted feature counts)
+        logger.info("Creating engagement signal graph")
+        signal_columns = [c for c in ['mention_count', 'emoji_count', 'hashtag_count', 'url_count'] if c in df.columns]
+        if signal_columns:
+            signal_df = (
+                df.groupby(pd.Grouper(key='timestamp', freq=time_window))[signal_columns].mean()
+                .reset_index()
+                .melt(id_vars='timestamp', var_name='signal', value_name='per_comment')
+            )
+            signal_df['signal'] = signal_df['signal'].str.replace('_count', '')
+            signal_fig = px.line(
+                downsample_series(signal_df, 'timestamp', 'per_comment', group='signal'),
+                x='timestamp',
+                y='per_comment',
+                color='signal',
+                title='Mentions, Emoji, Hashtags and Links per Comment',
+                labels={'per_comment': 'Per Comment', 'signal': 'Signal'}
+            )
+        else:
+            signal_fig = empty_figure("Engagement signal data not available")
+        
         # Comment length distribution
         logger.info("Creating comment length graph")
-        length_fig = px.histogram(
-            df,
-            x='comment_length',
+        length_bins = histogram_bins(df['comment_length'], nbins=50)
+        length_fig = px.bar(
+            length_bins,
+            x='bin_center',
+            y='count',
+            hover_data=['bin_start', 'bin_end'],
             title='Distribution of Comment Lengths',
-            nbins=50
+            labels={'bin_center': 'comment_length', 'count': 'count'}
         )
+        length_fig.update_layout(bargap=0)
         
         # Topic distribution
         logger.info("Creating topic distribution graph")
@@ -219,8 +468,7 @@ def update_graphs(time_window, selected_keyword):
         if 'topic_id' in df.columns:
             # Load topic information from JSON file
             try:
-                with open('output/topics.json', 'r') as f:
-                    topics_info = json.load(f)
+                topics_info = store.read_json(brand, 'topics.json')
                 
                 topic_details = html.Div([
                     html.Div([
@@ -250,7 +498,7 @@ def update_graphs(time_window, selected_keyword):
         # Day of week distribution
         logger.info("Creating day of week graph")
         day_fig = px.bar(
-            df.groupby('day_of_week').size().reset_index(),
+            df.groupby('day_of_week', observed=True).size().reset_index(),
             x='day_of_week',
             y=0,
             title='Comment Activity by Day of Week'
@@ -290,55 +538,12 @@ def update_graphs(time_window, selected_keyword):
             labels={'hashtag': 'Hashtag', 'count': 'Frequency'}
         )
         
-        # Hashtag co-occurrence network
-        logger.info("Creating hashtag co-occurrence network")
-        co_occurrences = Counter()
-        for tags in df['hashtags']:
-            if isinstance(tags, str):
-                tags = eval(tags)
-            if len(tags) > 1:
-                for i in range(len(tags)):
-                    for j in range(i + 1, len(tags)):
-                        pair = tuple(sorted([tags[i], tags[j]]))
-                        co_occurrences[pair] += 1
-        
-        # Create network graph
-        nodes = set()
-        edges = []
-        for (tag1, tag2), count in co_occurrences.most_common(50):  # Top 50 co-occurrences
-            nodes.add(tag1)
-            nodes.add(tag2)
-            edges.append({
-                'source': tag1,
-                'target': tag2,
-                'value': count
-            })
-        
-        nodes = [{'id': tag, 'group': 1} for tag in nodes]
-        
-        hashtag_network_fig = go.Figure(data=[
-            go.Sankey(
-                node=dict(
-                    pad=15,
-                    thickness=20,
-                    line=dict(color="black", width=0.5),
-                    label=[node['id'] for node in nodes],
-                    color=["blue" if node['group'] == 1 else "lightblue" for node in nodes]
-                ),
-                link=dict(
-                    source=[nodes.index({'id': edge['source'], 'group': 1}) for edge in edges],
-                    target=[nodes.index({'id': edge['target'], 'group': 1}) for edge in edges],
-                    value=[edge['value'] for edge in edges]
-                )
-            )
-        ])
-        
-        hashtag_network_fig.update_layout(title_text="Hashtag Co-occurrence Network")
-        
-        # Keyword frequency bar chart
+        # Keyword frequency bar chart: the analyzed keywords, counted in the selected comments
         logger.info("Creating keyword frequency graph")
+        slice_words = df['processed_comment'].astype(str).str.lower().str.split().explode()
+        keyword_df['frequency'] = keyword_df['keyword'].map(slice_words.value_counts()).fillna(0).astype(int)
         keyword_freq_fig = px.bar(
-            keyword_df,
+            keyword_df.sort_values('frequency', ascending=False),
             x='keyword',
             y='frequency',
             title='Keyword Frequency',
@@ -347,7 +552,7 @@ def update_graphs(time_window, selected_keyword):
         
         # Daily keyword trends
         logger.info("Creating daily keyword trends graph")
-        # Get top 10 keywords from the frequency analysis
+        # Get the top 10 keywords in the selected comments
         top_keywords = keyword_df.nlargest(10, 'frequency')['keyword'].tolist()
         
         # Create a DataFrame for daily keyword frequencies
@@ -377,7 +582,7 @@ def update_graphs(time_window, selected_keyword):
         
         # Create the time series plot
         daily_keyword_fig = px.line(
-            daily_keyword_df,
+            downsample_series(daily_keyword_df, 'date', 'count', group='keyword'),
             x='date',
             y='count',
             color='keyword',
@@ -395,11 +600,14 @@ def update_graphs(time_window, selected_keyword):
         # Keyword selector options
         keyword_options = [{'label': word, 'value': word} for word in keyword_df['keyword']]
         
+        # A keyword dropped by a brand switch or refresh counts as no selection
+        keyword_rows = keyword_df[keyword_df['keyword'] == selected_keyword]
+        keyword_row = None if keyword_rows.empty else keyword_rows.iloc[0]
+        
         # Keyword details
         logger.info("Creating keyword details")
         keyword_details = "Select a keyword to view details"
-        if selected_keyword:
-            keyword_row = keyword_df[keyword_df['keyword'] == selected_keyword].iloc[0]
+        if keyword_row is not None:
             
             # Parse related_terms from string to list of dictionaries
             related_terms = eval(keyword_row['related_terms']) if isinstance(keyword_row['related_terms'], str) else keyword_row['related_terms']
@@ -439,65 +647,164 @@ def update_graphs(time_window, selected_keyword):
         
         # Related terms network graph
         logger.info("Creating related terms network")
-        if selected_keyword:
-            keyword_row = keyword_df[keyword_df['keyword'] == selected_keyword].iloc[0]
+        if keyword_row is not None:
             related_terms = eval(keyword_row['related_terms']) if isinstance(keyword_row['related_terms'], str) else keyword_row['related_terms']
             
-            # Create nodes and edges for the network graph
-            nodes = [{'id': selected_keyword, 'group': 1}]
-            edges = []
-            
-            for term in related_terms:
-                nodes.append({'id': term['term'], 'group': 2})
-                edges.append({
-                    'source': selected_keyword,
-                    'target': term['term'],
-                    'value': term['count']
-                })
-            
-            related_terms_fig = go.Figure(data=[
-                go.Sankey(
-                    node=dict(
-                        pad=15,
-                        thickness=20,
-                        line=dict(color="black", width=0.5),
-                        label=[node['id'] for node in nodes],
-                        color=["blue" if node['group'] == 1 else "lightblue" for node in nodes]
-                    ),
-                    link=dict(
-                        source=[nodes.index({'id': edge['source'], 'group': 1}) for edge in edges],
-                        target=[nodes.index({'id': edge['target'], 'group': 2}) for edge in edges],
-                        value=[edge['value'] for edge in edges]
-                    )
-                )
-            ])
-            
-            related_terms_fig.update_layout(title_text=f"Related Terms for {selected_keyword}")
-        else:
-            related_terms_fig = go.Figure()
-            related_terms_fig.add_annotation(
-                text="Select a keyword to view related terms",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5,
-                showarrow=False
+            related_terms_fig = figure_cache.get_or_build(
+                ('related-terms', brand, store.version(brand), selected_keyword),
+                lambda: related_terms_figure(selected_keyword, related_terms)
             )
+        else:
+            related_terms_fig = empty_figure("Select a keyword to view related terms")
         
         logger.info("Graph update completed successfully")
-        return (volume_fig, length_fig, topic_fig, topic_details, day_fig, hour_fig,
-                hashtag_freq_fig, hashtag_network_fig, keyword_freq_fig, daily_keyword_fig,
+        return (volume_fig, signal_fig, length_fig, topic_fig, topic_details, day_fig, hour_fig,
+                hashtag_freq_fig, keyword_freq_fig, daily_keyword_fig,
                 keyword_options, keyword_details, related_terms_fig)
                 
     except Exception as e:
         logger.error(f"Error updating graphs: {str(e)}", exc_info=True)
-        # Return empty figures in case of error
-        empty_fig = go.Figure()
-        empty_fig.add_annotation(
-            text=f"Error: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False
+        return graph_outputs_message(f"Error: {str(e)}")
+
+def graph_outputs_message(message):
+    """update_graphs outputs that all show message: figures, empty keyword options and text details."""
+    fig = empty_figure(message)
+    return (fig, fig, fig, fig, message, fig, fig, fig, fig, fig, [], message, fig)
+
+@app.callback(
+    [Output('keyword-selector', 'value'),
+     Output('media-selector', 'value'),
+     Output('selection-brand', 'data')],
+    [Input('data-version', 'data')],
+    [State('selection-brand', 'data')]
+)
+def reset_selections(data_version, selection_brand=None):
+    """Clear the keyword and post selections when the dashboard switches brand."""
+    brand = version_brand(data_version)
+    if brand == selection_brand:
+        raise PreventUpdate
+    return None, None, brand
+
+@app.callback(
+    Output('media-selector', 'options'),
+    [Input('data-version', 'data'),
+     Input('media-selector', 'search_value')],
+    [State('media-selector', 'value')]
+)
+def update_media_options(data_version, search=None, selected=None):
+    """Post selector options, capped at MAX_MEDIA_OPTIONS so the payload stays small for any number of posts."""
+    brand = version_brand(data_version)
+    try:
+        counts = load_media_counts(brand)
+        media_ids = counts.index
+        if search:
+            media_ids = media_ids[media_ids.str.contains(search, case=False, regex=False)]
+        options = media_ids[:MAX_MEDIA_OPTIONS].tolist()
+        # Keep the current selection, or the dropdown would clear it
+        if selected and selected not in options:
+            options.append(selected)
+        return [{'label': f"{media_id} ({counts.get(media_id, 0)} comments)", 'value': media_id}
+                for media_id in options]
+    except Exception as e:
+        logger.error(f"Error loading post options: {str(e)}", exc_info=True)
+        return dash.no_update
+
+@app.callback(
+    Output('hashtag-network-graph', 'figure'),
+    [Input('hashtag-network-view', 'value'),
+     Input('data-version', 'data'),
+     Input('date-range-selector', 'start_date'),
+     Input('date-range-selector', 'end_date'),
+     Input('media-selector', 'value')]
+)
+def update_hashtag_network(view, data_version=None, start_date=None, end_date=None, media_id=None):
+    brand = version_brand(data_version)
+    try:
+        logger.info("Creating hashtag co-occurrence network")
+        version = store.version(brand)
+        # The precomputed graph covers the whole corpus; a filtered slice gets its own graph
+        if start_date or end_date or media_id:
+            load = lambda: load_filtered_hashtag_graph(brand, start_date, end_date, media_id)
+        else:
+            load = lambda: load_hashtag_graph(brand)
+        figure = hashtag_force_figure if view == 'force' else hashtag_sankey_figure
+        return figure_cache.get_or_build(
+            (f"hashtag-{view}", brand, version, start_date, end_date, media_id),
+            lambda: figure(load())
         )
-        return [empty_fig] * 12
+    except Exception as e:
+        logger.error(f"Error creating hashtag network: {str(e)}", exc_info=True)
+        return empty_figure(f"Error: {str(e)}")
+
+@app.callback(
+    [Output('refresh-status', 'children'),
+     Output('data-version', 'data')],
+    [Input('refresh-interval', 'n_intervals'),
+     Input('refresh-button', 'n_clicks'),
+     Input('brand-selector', 'value')],
+    [State('data-version', 'data')]
+)
+def update_refresh_status(n_intervals, n_clicks, brand, current_version):
+    """Trigger background refreshes and report when a new version has been published."""
+    try:
+        if dash.callback_context.triggered_id == 'refresh-button':
+            refresh_runner.submit(brand, brand_data_path(brand))
+        else:
+            refresh_runner.refresh_if_stale(brand, brand_data_path(brand))
+
+        if refresh_runner.is_running(brand):
+            status = "Refreshing in background, showing last completed results"
+        else:
+            age = refresh_runner.age(brand)
+            status = f"Data updated {age / 60:.0f} min ago" if age is not None else "No data available"
+
+        # Only push a new version when the brand or its version changed, so the graphs
+        # recompute once per swap. The version is sent as a string: nanosecond mtimes
+        # exceed the integer precision of the browser's JSON numbers
+        version = {'brand': brand, 'version': str(store.version(brand))}
+        if version == current_version:
+            return status, dash.no_update
+        return status, version
+    except Exception as e:
+        logger.error(f"Error checking refresh status: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}", dash.no_update
+
+if live_aggregator is not None:
+    @app.callback(
+        [Output('live-state', 'data'),
+         Output('live-volume-graph', 'figure'),
+         Output('live-hashtag-graph', 'figure'),
+         Output('live-keyword-graph', 'figure'),
+         Output('live-status', 'children')],
+        [Input('live-interval', 'n_intervals')],
+        [State('live-state', 'data')]
+    )
+    def update_live(n_intervals, state):
+        """Merge the buckets changed since the last tick into the client-side state."""
+        try:
+            # A restarted server starts counting again; resync from scratch
+            since = state['seq'] if state and state['seq'] <= live_aggregator.seq else 0
+            delta = live_aggregator.delta(since)
+            if state and delta['seq'] == since:
+                return [dash.no_update] * 5
+
+            buckets = {bucket['time']: bucket for bucket in state['buckets']} if since else {}
+            buckets.update((bucket['time'], bucket) for bucket in delta['buckets'])
+            window_start = delta['window_start']
+            kept = [buckets[t] for t in sorted(buckets) if window_start is None or t >= window_start]
+
+            status = (f"{delta['total']} comments in window, {delta['late']} late, {delta['rejected']} rejected, "
+                      f"updated {datetime.now():%H:%M:%S}")
+            return (
+                {'seq': delta['seq'], 'buckets': kept},
+                live_volume_figure(kept),
+                ranked_bar_figure(delta['hashtags'], 'Live Top Hashtags', uirevision='live'),
+                ranked_bar_figure(delta['keywords'], 'Live Top Keywords', uirevision='live'),
+                status
+            )
+        except Exception as e:
+            logger.error(f"Error updating live view: {str(e)}", exc_info=True)
+            return [dash.no_update] * 4 + [f"Error: {str(e)}"]
 
 def get_topic_description(top_words):
     """Generate a description of the topic based on its top words."""
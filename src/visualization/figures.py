@@ -0,0 +1,186 @@
+import plotly.graph_objects as go
+import numpy as np
+import json
+import threading
+from collections import OrderedDict
+
+class FigureCache:
+    """Small LRU cache of serialized figures keyed by (graph, parameters)."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Return the cached figure for key, building and serializing it once on a miss."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return json.loads(self._items[key])
+
+        figure_json = build().to_json()
+
+        with self._lock:
+            self._items[key] = figure_json
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return json.loads(figure_json)
+
+def empty_figure(message):
+    """Blank figure carrying a centered message."""
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5,
+        showarrow=False
+    )
+    return fig
+
+def sankey_figure(labels, source, target, value, colors, title):
+    """Sankey figure from integer-indexed node and link arrays."""
+    fig = go.Figure(data=[
+        go.Sankey(
+            node=dict(
+                pad=15,
+                thickness=20,
+                line=dict(color="black", width=0.5),
+                label=list(labels),
+                color=list(colors)
+            ),
+            link=dict(
+                source=np.asarray(source).tolist(),
+                target=np.asarray(target).tolist(),
+                value=np.asarray(value).tolist()
+            )
+        )
+    ])
+    fig.update_layout(title_text=title)
+    return fig
+
+def top_edges(graph, max_edges):
+    """Take the heaviest edges and re-index the nodes they touch.
+
+    Returns (labels, node_index, source, target, value) where node_index maps
+    the new node positions back into the graph's node arrays.
+    """
+    value = np.asarray(graph['value'])
+    order = np.argsort(-value, kind='stable')[:max_edges]
+    source = np.asarray(graph['source'], dtype=np.int64)[order]
+    target = np.asarray(graph['target'], dtype=np.int64)[order]
+    node_index, inverse = np.unique(np.concatenate([source, target]), return_inverse=True)
+    labels = np.asarray(graph['labels'], dtype=object)[node_index]
+    return labels, node_index, inverse[:len(order)], inverse[len(order):], value[order]
+
+def hashtag_sankey_figure(graph, max_edges=50):
+    """Hashtag co-occurrence Sankey over the top co-occurring pairs."""
+    if not graph['value']:
+        return empty_figure("No hashtag co-occurrences found")
+    labels, _, source, target, value = top_edges(graph, max_edges)
+    return sankey_figure(labels, source, target, value, ["blue"] * len(labels),
+                         "Hashtag Co-occurrence Network")
+
+def top_nodes(graph, max_nodes, max_edges):
+    """Keep the most frequent nodes and the heaviest edges between them.
+
+    Returns (node_index, source, target) with node_index into the graph's
+    node arrays and source/target re-indexed into node_index.
+    """
+    node_index = np.sort(np.argsort(-np.asarray(graph['counts']), kind='stable')[:max_nodes])
+    position = np.full(len(graph['labels']), -1, dtype=np.int64)
+    position[node_index] = np.arange(len(node_index))
+    source = position[np.asarray(graph['source'], dtype=np.int64)]
+    target = position[np.asarray(graph['target'], dtype=np.int64)]
+    kept = np.flatnonzero((source >= 0) & (target >= 0))
+    order = kept[np.argsort(-np.asarray(graph['value'])[kept], kind='stable')[:max_edges]]
+    return node_index, source[order], target[order]
+
+def hashtag_force_figure(graph, max_nodes=500, max_edges=2000):
+    """Force-directed hashtag network over the most frequent hashtags, from precomputed node positions."""
+    if not graph['labels'] or 'x' not in graph:
+        return empty_figure("Hashtag network layout not available")
+
+    node_index, source, target = top_nodes(graph, max_nodes, max_edges)
+    x = np.asarray(graph['x'])[node_index]
+    y = np.asarray(graph['y'])[node_index]
+    counts = np.asarray(graph['counts'])[node_index]
+    labels = np.asarray(graph['labels'], dtype=object)[node_index].tolist()
+
+    # All edges in one trace, separated by NaN gaps
+    edge_x = np.column_stack([x[source], x[target], np.full(len(source), np.nan)]).ravel()
+    edge_y = np.column_stack([y[source], y[target], np.full(len(source), np.nan)]).ravel()
+
+    fig = go.Figure(data=[
+        go.Scattergl(
+            x=edge_x, y=edge_y,
+            mode='lines',
+            line=dict(width=0.5, color='#bbb'),
+            hoverinfo='skip'
+        ),
+        go.Scattergl(
+            x=x, y=y,
+            mode='markers',
+            text=labels,
+            customdata=counts,
+            hovertemplate='#%{text}<br>Count: %{customdata}<extra></extra>',
+            marker=dict(
+                size=4 + 16 * np.sqrt(counts / counts.max()),
+                color=np.log1p(counts),
+                colorscale='Blues',
+                line=dict(width=0.5, color='black')
+            )
+        )
+    ])
+    fig.update_layout(
+        title_text="Hashtag Co-occurrence Network",
+        showlegend=False,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False)
+    )
+    return fig
+
+def related_terms_figure(keyword, related_terms):
+    """Sankey linking a keyword to its co-occurring terms."""
+    labels = [keyword] + [term['term'] for term in related_terms]
+    n_terms = len(related_terms)
+    return sankey_figure(
+        labels,
+        np.zeros(n_terms, dtype=np.int64),
+        np.arange(1, n_terms + 1),
+        [term['count'] for term in related_terms],
+        ["blue"] + ["lightblue"] * n_terms,
+        f"Related Terms for {keyword}"
+    )
+
+def live_volume_figure(buckets):
+    """Comments per bucket with mean sentiment on a second axis, from live delta buckets."""
+    times = [bucket['time'] for bucket in buckets]
+    fig = go.Figure([
+        go.Bar(x=times, y=[bucket['count'] for bucket in buckets], name='Comments'),
+        go.Scatter(x=times, y=[bucket['sentiment'] for bucket in buckets], name='Sentiment',
+                   yaxis='y2', mode='lines+markers')
+    ])
+    fig.update_layout(
+        title='Live Comment Volume and Sentiment',
+        yaxis=dict(title='Comments'),
+        yaxis2=dict(title='Mean sentiment', overlaying='y', side='right'),
+        # Keep zoom and legend state between interval updates
+        uirevision='live'
+    )
+    return fig
+
+def ranked_bar_figure(items, title, uirevision=None):
+    """Horizontal bar chart of (label, count) pairs, largest on top.
+
+    Pass a uirevision to keep zoom state between updates of a live chart.
+    """
+    items = list(items)[::-1]
+    fig = go.Figure(go.Bar(
+        x=[count for _, count in items],
+        y=[label for label, _ in items],
+        orientation='h'
+    ))
+    fig.update_layout(title=title, uirevision=uirevision)
+    return fig
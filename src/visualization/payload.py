@@ -0,0 +1,99 @@
+import pandas as pd
+import numpy as np
+import gzip
+from flask import request
+
+# Upper bound on points sent to the browser for a single line trace
+MAX_POINTS_PER_SERIES = 1000
+
+def histogram_bins(values, nbins=50):
+    """Pre-bin values server-side so only bin edges and counts are shipped."""
+    values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy()
+    if len(values) == 0:
+        return pd.DataFrame({'bin_start': [], 'bin_end': [], 'bin_center': [], 'count': []})
+    counts, edges = np.histogram(values, bins=nbins)
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'bin_center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts
+    })
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of the points to keep, always including the first
+    and last point. x must be numeric and sorted.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries for the points between the fixed first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            next_stop = max(edges[i + 2], stop + 1)
+            avg_x, avg_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+def downsample_series(df, x, y, max_points=MAX_POINTS_PER_SERIES, group=None):
+    """Downsample each line of a long-format frame to at most max_points points."""
+    if df.empty or (group is not None and group not in df.columns):
+        return df
+    if group is not None:
+        parts = [downsample_series(part, x, y, max_points) for _, part in df.groupby(group, sort=False)]
+        return pd.concat(parts, ignore_index=True) if parts else df
+
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values(x)
+    x_values = df[x]
+    if not pd.api.types.is_numeric_dtype(x_values):
+        x_values = pd.to_datetime(x_values).astype('int64')
+    x_numeric = x_values.to_numpy()
+    return df.iloc[lttb_indices(x_numeric, df[y].to_numpy(), max_points)]
+
+def install_gzip(server, min_size=1024, level=6):
+    """Gzip-compress sufficiently large responses on the Flask server."""
+    @server.after_request
+    def compress_response(response):
+        # Streamed bodies would have to be buffered, and partial content would no longer
+        # match its Content-Range
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code >= 300
+                or response.status_code == 206
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Content-Length'] = len(response.get_data())
+        # Only compressed responses vary by Accept-Encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    return compress_response
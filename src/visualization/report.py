@@ -0,0 +1,210 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import importlib.util
+from datetime import datetime
+from html import escape
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from analysis.network_analyzer import HashtagNetworkAnalyzer
+from visualization.figures import empty_figure, hashtag_sankey_figure, ranked_bar_figure
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = ['png', 'pdf']
+
+def build_report_figures(store, brand):
+    """Report figures for a brand, built only from its precomputed artifacts.
+
+    Returns a list of (name, figure) pairs in report order; figures whose
+    artifacts are missing are skipped.
+    """
+    figures = []
+
+    if os.path.exists(store.artifact_path(brand, 'aggregates.json')):
+        aggregates = store.read_json(brand, 'aggregates.json')
+        volume = aggregates['volume'].get('1D', [])
+        figures.append(('volume', go.Figure(
+            go.Scatter(x=[point['time'] for point in volume], y=[point['count'] for point in volume], mode='lines'),
+            layout=dict(title='Daily Comment Volume')
+        )))
+
+        signals = aggregates.get('signals', {}).get('1D', [])
+        if signals:
+            signal_fig = go.Figure(layout=dict(title='Mentions, Emoji, Hashtags and Links per Comment'))
+            for signal in [key for key in signals[0] if key != 'time']:
+                signal_fig.add_trace(go.Scatter(x=[point['time'] for point in signals],
+                                                y=[point[signal] for point in signals], mode='lines', name=signal))
+            figures.append(('signals', signal_fig))
+
+        lengths = aggregates.get('comment_lengths', [])
+        if lengths:
+            figures.append(('comment_lengths', go.Figure(
+                go.Bar(x=[(item['bin_start'] + item['bin_end']) / 2 for item in lengths],
+                       y=[item['count'] for item in lengths]),
+                layout=dict(title='Distribution of Comment Lengths', bargap=0,
+                            xaxis_title='comment_length', yaxis_title='count')
+            )))
+
+        trends = go.Figure(layout=dict(title='Daily Keyword Trends'))
+        series = {}
+        for window in aggregates['keywords'].get('1D', []):
+            for item in window['keywords']:
+                series.setdefault(item['keyword'], ([], []))
+                series[item['keyword']][0].append(window['time'])
+                series[item['keyword']][1].append(item['count'])
+        for keyword, (times, counts) in series.items():
+            trends.add_trace(go.Scatter(x=times, y=counts, mode='lines', name=keyword))
+        figures.append(('keyword_trends', trends))
+
+        topics = aggregates['topics']
+        figures.append(('topics', go.Figure(
+            go.Pie(labels=[f"Topic {topic['topic_id']}" for topic in topics], values=[topic['count'] for topic in topics]),
+            layout=dict(title='Topic Distribution')
+        )))
+        if topics and os.path.exists(store.artifact_path(brand, 'topics.json')):
+            top_words = {topic['topic_id']: topic['top_words'] for topic in store.read_json(brand, 'topics.json')}
+            figures.append(('topic_details', go.Figure(
+                go.Table(
+                    header=dict(values=['Topic', 'Comments', 'Top words']),
+                    cells=dict(values=[[topic['topic_id'] for topic in topics],
+                                       [topic['count'] for topic in topics],
+                                       [', '.join(top_words.get(topic['topic_id'], [])) for topic in topics]]),
+                    columnwidth=[1, 1, 6]
+                ),
+                layout=dict(title='Topic Details')
+            )))
+
+        activity = aggregates.get('activity')
+        if activity:
+            figures.append(('day_of_week', go.Figure(
+                go.Bar(x=[item['day'] for item in activity['day_of_week']],
+                       y=[item['count'] for item in activity['day_of_week']]),
+                layout=dict(title='Comment Activity by Day of Week')
+            )))
+            figures.append(('hour', go.Figure(
+                go.Bar(x=[item['hour'] for item in activity['hour']], y=[item['count'] for item in activity['hour']]),
+                layout=dict(title='Comment Activity by Hour')
+            )))
+        figures.append(('hashtags', ranked_bar_figure(
+            [(f"#{item['hashtag']}", item['count']) for item in aggregates['hashtags'][:20]], 'Top 20 Hashtags'
+        )))
+
+    if os.path.exists(store.artifact_path(brand, 'keyword_analysis.csv')):
+        keywords = pd.read_csv(store.artifact_path(brand, 'keyword_analysis.csv'), usecols=['keyword', 'frequency'])
+        figures.append(('keywords', ranked_bar_figure(
+            keywords.nlargest(20, 'frequency').itertuples(index=False, name=None), 'Keyword Frequency'
+        )))
+
+    if os.path.exists(store.artifact_path(brand, 'hashtag_network.json')):
+        graph = HashtagNetworkAnalyzer.load(store.artifact_path(brand, 'hashtag_network.json'))
+        figures.append(('hashtag_network', hashtag_sankey_figure(graph)))
+
+    if not figures:
+        figures.append(('empty', empty_figure(f"No outputs found for {brand}")))
+    return figures
+
+def _render_image(figure_json, path, image_format, width, height):
+    """Render one serialized figure to an image file; runs in a worker process."""
+    pio.from_json(figure_json).write_image(path, format=image_format, width=width, height=height)
+    return path
+
+class ReportExporter:
+    """Export static per-brand reports: one standalone HTML file plus PNG/PDF figures.
+
+    Images are rendered with kaleido in a process pool, across all brands at
+    once, and cached under cache_dir by a hash of the figure JSON and render
+    settings, so charts whose data did not change since the last export are
+    copied from the cache instead of rendered again. Without kaleido only
+    the HTML reports are written.
+    """
+
+    def __init__(self, cache_dir, formats=None, max_workers=None, width=1000, height=500):
+        self.cache_dir = cache_dir
+        self.formats = list(formats or ['html'] + IMAGE_FORMATS)
+        self.max_workers = max_workers
+        self.width = width
+        self.height = height
+
+    def figure_key(self, figure_json, image_format):
+        content = json.dumps([figure_json, image_format, self.width, self.height])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _cache_path(self, figure_json, image_format):
+        return os.path.join(self.cache_dir, f"{self.figure_key(figure_json, image_format)}.{image_format}")
+
+    def write_html(self, brand, figures, path):
+        """Standalone HTML report with plotly.js embedded once."""
+        sections = [
+            f"<section><h2>{escape(fig.layout.title.text or name)}</h2>"
+            f"{fig.to_html(full_html=False, include_plotlyjs=False, default_width='100%')}</section>"
+            for name, fig in figures
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+                f"<title>{escape(brand)} report</title>"
+                f"<script type='text/javascript'>{get_plotlyjs()}</script></head><body>"
+                f"<h1>Social Media Trend Report: {escape(brand)}</h1>"
+                f"<p>Generated {datetime.now():%Y-%m-%d %H:%M}</p>"
+                + "".join(sections) + "</body></html>"
+            )
+
+    def export(self, store, brands, report_dir):
+        """Write reports for the brands under report_dir/<brand>/; returns render statistics."""
+        image_formats = [fmt for fmt in self.formats if fmt in IMAGE_FORMATS]
+        if image_formats and importlib.util.find_spec('kaleido') is None:
+            logger.warning("kaleido is not installed; skipping PNG/PDF export (pip install kaleido)")
+            image_formats = []
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Image jobs across all brands: (cache path, figure JSON, format) -> output paths
+        jobs = {}
+        for brand in brands:
+            brand_dir = os.path.join(report_dir, brand)
+            os.makedirs(brand_dir, exist_ok=True)
+            figures = build_report_figures(store, brand)
+            if 'html' in self.formats:
+                self.write_html(brand, figures, os.path.join(brand_dir, 'report.html'))
+            for name, fig in figures:
+                figure_json = fig.to_json()
+                for image_format in image_formats:
+                    key = (self._cache_path(figure_json, image_format), figure_json, image_format)
+                    jobs.setdefault(key, []).append(os.path.join(brand_dir, f"{name}.{image_format}"))
+
+        pending = [key for key in jobs if not os.path.exists(key[0])]
+        stats = {'brands': len(brands), 'images': sum(len(paths) for paths in jobs.values()),
+                 'rendered': 0, 'cached': len(jobs) - len(pending), 'failed': []}
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for key in pending:
+                    cache_path, figure_json, image_format = key
+                    # Render to a temporary name so an interrupted export never leaves a truncated cache entry
+                    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                    future = executor.submit(_render_image, figure_json, tmp_path, image_format,
+                                             self.width, self.height)
+                    futures[future] = (tmp_path, key)
+                for future in as_completed(futures):
+                    tmp_path, key = futures[future]
+                    try:
+                        future.result()
+                        os.replace(tmp_path, key[0])
+                        stats['rendered'] += 1
+                    except Exception as e:
+                        # One failed image must not abort the other charts and brands
+                        logger.error(f"Failed to render {', '.join(jobs[key])}: {e}")
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        stats['failed'].extend(jobs.pop(key))
+
+        for (cache_path, _, _), paths in jobs.items():
+            for path in paths:
+                shutil.copyfile(cache_path, path)
+        return stats